@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# adaptive_concurrency.py
+"""
+Runs per-ticket API work in parallel with a self-tuning number of requests in flight.
+
+A fixed worker count is either too low (rate budget left unused) or too
+high (429 storms and slow responses). AdaptiveConcurrency adjusts the limit
+the way TCP congestion control does, additive increase / multiplicative
+decrease (AIMD):
+
+    success        the limit grows by 1/limit, i.e. by one per round of
+                   `limit` completed requests
+    429            the limit is halved and new requests wait out Retry-After;
+                   the throttled item is retried
+    slow response  when the smoothed latency climbs past `tolerance` times
+                   the unloaded latency (the lowest smoothed latency seen,
+                   allowed to drift up slowly), the limit is halved as
+                   well; the server is queueing, so more parallelism
+                   would not help
+
+At most one decrease happens per round trip, so a burst of 429s from the
+same window counts once. The limit therefore settles just below the point
+where Zendesk starts pushing back, without manual tuning. When a run ends,
+report() logs the concurrency it settled on.
+
+Work functions signal throttling by raising Throttled:
+
+    controller = AdaptiveConcurrency("delete_tickets")
+    for ticket_id, deleted in controller.map(delete_ticket, ticket_ids):
+        ...
+    controller.report()
+
+Simulate against a fake server whose latency grows past 12 requests in flight:
+    python adaptive_concurrency.py --capacity 12
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+INITIAL = 4
+MINIMUM = 1
+MAXIMUM = int(os.getenv("ZENDESK_MAX_CONCURRENCY", "32"))
+BACKOFF = 0.5  # Multiplicative decrease
+TOLERANCE = 2.0  # Smoothed latency over unloaded latency that counts as congestion
+DRIFT = 0.00005  # Per-request upward drift of the unloaded latency, so it follows a slower API
+MIN_SAMPLES = 20
+
+
+class Throttled(Exception):
+    """Raised by a work function when Zendesk answered 429."""
+
+    def __init__(self, retry_after=None):
+        super().__init__(f"Rate limited (Retry-After: {retry_after})")
+        self.retry_after = retry_after
+
+
+class AdaptiveConcurrency:
+    """
+    An AIMD limit on requests in flight.
+
+    Args:
+        name (str): Shown in the log lines.
+        initial, minimum, maximum (int): Starting limit and bounds.
+        tolerance (float): Latency increase over the unloaded latency treated as congestion.
+    """
+
+    def __init__(self, name, initial=INITIAL, minimum=MINIMUM, maximum=MAXIMUM, tolerance=TOLERANCE):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self.throttled = 0
+        self.completed = 0
+        self.history = []  # Limit after each completion
+        self._condition = threading.Condition()
+        self._smoothed = None
+        self._unloaded = None
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+
+    def acquire(self):
+        """Blocks until a request may start."""
+        with self._condition:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    self._condition.wait(pause)
+                elif self.in_flight < int(self.limit):
+                    break
+                else:
+                    self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency=None, throttled=False, retry_after=None):
+        """Records the outcome of a request started with acquire()."""
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                self.throttled += 1
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + float(retry_after))
+                self._decrease(now, "rate limited")
+            elif latency is not None:
+                self.completed += 1
+                self._smoothed = latency if self._smoothed is None else 0.8 * self._smoothed + 0.2 * latency
+                self._unloaded = self._smoothed if self._unloaded is None else \
+                    min(self._unloaded * (1 + DRIFT), self._smoothed)
+                if self.completed >= MIN_SAMPLES and self._smoothed > self._unloaded * self.tolerance:
+                    self._decrease(now, None)
+                else:
+                    self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                self.history.append(self.limit)
+            self._condition.notify_all()
+
+    def _decrease(self, now, reason):
+        # One decrease per round trip: responses already in flight reflect the old limit
+        if now - self._last_decrease < (self._smoothed or 0):
+            return
+        previous = self.limit
+        self.limit = max(self.minimum, self.limit * BACKOFF)
+        self._last_decrease = now
+        if reason:
+            print(f"[{self.name}] {reason}, concurrency {previous:.0f} -> {self.limit:.0f}")
+
+    def _run(self, func, item):
+        while True:
+            started = time.monotonic()
+            try:
+                result = func(item)
+            except Throttled as e:
+                self.release(throttled=True, retry_after=e.retry_after)
+                self.acquire()
+                continue
+            except BaseException:
+                self.release()
+                raise
+            self.release(time.monotonic() - started)
+            return item, result
+
+    def map(self, func, items):
+        """
+        Calls func(item) for every item, keeping `limit` calls in flight.
+
+        Yields:
+            (item, result) pairs as they complete (not in input order).
+            Items whose call raised Throttled are retried.
+        """
+        with ThreadPoolExecutor(max_workers=self.maximum) as executor:
+            pending = deque()
+            for item in items:
+                self.acquire()
+                pending.append(executor.submit(self._run, func, item))
+                while pending and pending[0].done():
+                    yield pending.popleft().result()
+                # Don't let finished calls pile up behind a slow one
+                if len(pending) > self.maximum * 4:
+                    yield from self._drain_done(pending)
+            while pending:
+                yield pending.popleft().result()
+
+    @staticmethod
+    def _drain_done(pending):
+        for future in [future for future in pending if future.done()]:
+            pending.remove(future)
+            yield future.result()
+
+    def settled(self):
+        """The limit the run settled on: the median over its second half."""
+        if not self.history:
+            return self.limit
+        return statistics.median(self.history[len(self.history) // 2:])
+
+    def report(self):
+        if not self.completed:
+            return
+        message = (f"[{self.name}] Concurrency settled at ~{self.settled():.0f} "
+                   f"(range {min(self.history):.0f}-{max(self.history):.0f}) over {self.completed} requests")
+        if self.throttled:
+            message += f", {self.throttled} rate-limited responses retried"
+        print(message)
+
+
+def _simulate(capacity, requests_total, base_latency, rate_per_second):
+    """A fake server: latency grows once more than `capacity` requests are in flight."""
+    lock = threading.Lock()
+    state = {"in_flight": 0, "window": time.monotonic(), "count": 0}
+
+    def call(_):
+        with lock:
+            now = time.monotonic()
+            if now - state["window"] >= 1:
+                state["window"], state["count"] = now, 0
+            state["count"] += 1
+            if rate_per_second and state["count"] > rate_per_second:
+                raise Throttled(retry_after=1)
+            state["in_flight"] += 1
+            load = state["in_flight"]
+        time.sleep(base_latency * max(1.0, load / capacity))
+        with lock:
+            state["in_flight"] -= 1
+
+    controller = AdaptiveConcurrency("simulation")
+    started = time.monotonic()
+    for _ in controller.map(call, range(requests_total)):
+        pass
+    elapsed = time.monotonic() - started
+    controller.report()
+    best = capacity / base_latency
+    if rate_per_second:
+        best = min(best, rate_per_second)
+    print(f"{requests_total / elapsed:.0f} requests/s (best possible ~{best:.0f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch the AIMD controller converge on a simulated server.")
+    parser.add_argument("--capacity", type=int, default=12, help="Requests the server handles without slowing")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Unloaded latency, seconds")
+    parser.add_argument("--rate", type=int, default=0, help="Requests per second before 429s (0 = no limit)")
+    args = parser.parse_args()
+    _simulate(args.capacity, args.requests, args.latency, args.rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -30,7 +30,8 @@ Instructions for Using the add_tags.py Script:
           101112,
           ```
     *   Each row in the CSV represents a ticket that will be updated.
-    *   The first row in the csv will be ignored.
+    *   A header row, if present, is skipped. Duplicate ticket IDs are only updated once, and rows
+        without a valid ticket ID are listed when the file is read.
     *   Save the `add_tags.csv` file.
 
 3.  Running the Script:
@@ -45,10 +46,24 @@ Instructions for Using the add_tags.py Script:
         /path/to/your/virtual_env/bin/python add_tags.py
         ```
 
+    *   To only see what would change, without updating anything:
+        ```bash
+        python add_tags.py --dry-run
+        ```
+
+    *   To read another file, or IDs piped in on stdin:
+        ```bash
+        python add_tags.py other_tickets.csv
+        cat tickets.csv | python add_tags.py -
+        ```
+
 4.  Checking the Results:
     *   The script will print messages to the console indicating whether the tags were successfully added or if there were any errors.
     *   Log in to your Zendesk account and verify that the specified tags have been added to the correct tickets.
     * If there is an error, the script will provide you with an error message.
+    * Before updating, the script looks up the current tags on every ticket (100 tickets per request)
+      and prints a summary. Tickets that already have the tag are skipped, so re-running the script
+      on the same CSV only updates the tickets that still need it.
 
 5. Additional info:
     * If you renamed the script for any reason (e.g., update_tickets.py), you can simply create a update_tickets.csv and the script will now look for that file. No code change required.
@@ -59,7 +74,15 @@ from requests.auth import HTTPBasicAuth
 import os
 from dotenv import load_dotenv
 import json
-import csv
+import argparse
+import time
+from journal import Journal
+from id_input import IdReader
+from rate_limiter import get_rate_limiter
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Load environment variables from .env file
 load_dotenv()
@@ -69,19 +92,66 @@ SUBDOMAIN = os.getenv("ZENDESK_SUBDOMAIN")
 EMAIL = os.getenv("ZENDESK_EMAIL")
 API_TOKEN = os.getenv("ZENDESK_API_TOKEN")
 
-# Zendesk API endpoint for updating tickets
+# Zendesk API endpoints for updating and looking up tickets
 TICKETS_ENDPOINT = f"https://{SUBDOMAIN}.zendesk.com/api/v2/tickets/update_many"
+SHOW_MANY_ENDPOINT = f"https://{SUBDOMAIN}.zendesk.com/api/v2/tickets/show_many.json"
+
+# show_many and update_many both accept at most 100 tickets per request
+BATCH_SIZE = 100
+MAX_RETRIES = 5
+JOB_POLL_SECONDS = 2  # Between job_status checks while update_many runs
 
 # Authentication
 auth = HTTPBasicAuth(f"{EMAIL}/token", API_TOKEN)
 
-def add_tag_to_tickets(ticket_ids, tag_to_add):
+def send_request(method, url, **kwargs):
+    """
+    Sends a request through the shared rate limiter, waiting out 429 responses.
+
+    On a 429 every script sharing the account is paused for Retry-After and
+    the request is sent again, up to MAX_RETRIES times.
+
+    Returns:
+        requests.Response: The final response, which is a 429 only if every retry was throttled.
+    """
+    for _ in range(MAX_RETRIES):
+        get_rate_limiter().acquire()  # Share the account's budget with other running scripts
+        response = requests.request(method, url, auth=auth, **kwargs)
+        if response.status_code != 429:
+            break
+        wait = int(response.headers.get("Retry-After", 60))
+        print(f"Rate limited, retrying in {wait} seconds...")
+        get_rate_limiter().penalize(wait)
+    return response
+
+def wait_for_job(job_status):
     """
-    Adds a specified tag to a list of Zendesk tickets.
+    Polls an update_many job until Zendesk has finished it.
+
+    Args:
+        job_status (dict): The job_status returned when the job was queued.
+
+    Returns:
+        dict: The final job_status, with a result per ticket under "results".
+    """
+    while job_status.get("status") in ("queued", "working"):
+        time.sleep(JOB_POLL_SECONDS)
+        response = send_request("GET", job_status["url"])
+        response.raise_for_status()
+        job_status = response.json()["job_status"]
+    return job_status
+
+def add_tag_to_tickets(ticket_ids, tag_to_add, journal=None):
+    """
+    Adds a specified tag to a list of Zendesk tickets, keeping their other tags.
+
+    update_many is sent `additional_tags`, which appends to each ticket's tags;
+    `tags` would replace the whole list.
 
     Args:
         ticket_ids (list): A list of Zendesk ticket IDs (integers or strings).
         tag_to_add (str): The tag to add to the tickets.
+        journal (Journal, optional): Records the tickets Zendesk's job reports as updated.
     """
 
     if not ticket_ids:
@@ -100,39 +170,128 @@ def add_tag_to_tickets(ticket_ids, tag_to_add):
         print(f"Error: Invalid ticket ID format. Must be an integer: {e}")
         return
     
-    #Join the id with a comma    
-    ticket_ids_str = ",".join(ticket_ids_str)
-
     headers = {
         "Content-Type": "application/json",
     }
 
-    payload = {
-        "ids": ticket_ids_str, #Now a string
-        "ticket": {
-            "tags": [tag_to_add]
+    for start in range(0, len(ticket_ids_str), BATCH_SIZE):
+        batch = ticket_ids_str[start:start + BATCH_SIZE]
+
+        payload = {
+            "ids": ",".join(batch), #Join the ids with a comma
+            "ticket": {
+                "additional_tags": [tag_to_add]  # Appends; "tags" would replace every tag
+            }
         }
-    }
-    
-    response = requests.put(
-        TICKETS_ENDPOINT, auth=auth, headers=headers, data=json.dumps(payload)
-    )
-
-    if response.status_code == 200:
-        print(f"Successfully added tag '{tag_to_add}' to tickets: {ticket_ids}")
-        # Optionally print the response details for more information
-        #print("Response details:", response.json())
-    elif response.status_code == 422:
-        print(f"Error: {response.status_code}")
-        response_data = response.json()
-        if 'details' in response_data:
-          for detail in response_data['details']:
-            print(f"  - Ticket: {detail} Errors: {response_data['details'][detail][0]['description']}")
+
+        # Waits out 429s (Retry-After) and sends the batch again
+        response = send_request("PUT", TICKETS_ENDPOINT, headers=headers, data=json.dumps(payload))
+
+        if response.status_code == 200:
+            # update_many only queues a job; the tickets are updated once it completes
+            try:
+                job = wait_for_job(response.json()["job_status"])
+            except requests.exceptions.RequestException as e:
+                print(f"Error: could not check the update of tickets {batch[0]}-{batch[-1]}: {e}")
+                print("  These tickets are not recorded as done; re-run to check them again.")
+                continue
+            results = job.get("results") or []
+            updated = [str(result["id"]) for result in results if result.get("success")]
+            print(f"Successfully added tag '{tag_to_add}' (existing tags kept) to {len(updated)} of {len(batch)} "
+                  f"tickets: {updated}")
+            for result in results:
+                if not result.get("success"):
+                    print(f"  - Ticket: {result.get('id')} Errors: {result.get('errors') or result.get('details')}")
+            if job.get("status") != "completed":
+                print(f"  Job {job.get('id')} ended as '{job.get('status')}': {job.get('message')}")
+            if journal is not None and updated:
+                journal.record(f"add_tag:{tag_to_add}", updated)
+        elif response.status_code == 422:
+            print(f"Error: {response.status_code}")
+            response_data = response.json()
+            if 'details' in response_data:
+              for detail in response_data['details']:
+                print(f"  - Ticket: {detail} Errors: {response_data['details'][detail][0]['description']}")
+            else:
+              print(response.text)
+        elif response.status_code == 429:
+            print(f"Error: still rate limited after {MAX_RETRIES} attempts; tickets {batch[0]}-{batch[-1]} "
+                  f"were not updated. Re-run to retry them.")
         else:
-          print(response.text)
-    else:
-        print(f"Error: {response.status_code}")
-        print(response.text)
+            print(f"Error: {response.status_code}")
+            print(response.text)
+
+def fetch_current_tags(ticket_ids):
+    """
+    Looks up the current tags on each ticket, 100 tickets per request.
+
+    Args:
+        ticket_ids (list): Ticket IDs as integers.
+
+    Returns:
+        dict: Ticket ID (int) -> set of tags. Tickets missing from a successful
+              response do not exist (or are not visible) and are left out.
+
+    Raises:
+        requests.exceptions.HTTPError: If a batch cannot be looked up, so no
+            ticket is wrongly reported as not found.
+    """
+    current_tags = {}
+    for start in range(0, len(ticket_ids), BATCH_SIZE):
+        batch = ticket_ids[start:start + BATCH_SIZE]
+        response = send_request("GET", SHOW_MANY_ENDPOINT, params={"ids": ",".join(map(str, batch))})
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(
+                f"Error looking up tickets {batch[0]}-{batch[-1]}: {response.status_code} {response.text}",
+                response=response,
+            )
+        for ticket in response.json().get("tickets", []):
+            current_tags[ticket["id"]] = set(ticket.get("tags", []))
+    return current_tags
+
+def plan_tag_changes(ticket_ids, tag_to_add):
+    """
+    Works out which tickets actually need the tag.
+
+    Args:
+        ticket_ids (list): Zendesk ticket IDs (integers or strings).
+        tag_to_add (str): The tag to add to the tickets.
+
+    Returns:
+        dict: 'to_update' (tickets missing the tag), 'already_tagged' and
+              'not_found' lists of ticket IDs. Returns None if an ID is invalid
+              or the current tags could not be looked up.
+    """
+    try:
+        # Drop duplicate rows while keeping the CSV order
+        ids = list(dict.fromkeys(int(ticket_id) for ticket_id in ticket_ids))
+    except ValueError as e:
+        print(f"Error: Invalid ticket ID format. Must be an integer: {e}")
+        return None
+
+    try:
+        current_tags = fetch_current_tags(ids)
+    except requests.exceptions.RequestException as e:
+        print(f"Aborting: could not look up the current tags ({e}). No tickets were updated.")
+        return None
+    plan = {"to_update": [], "already_tagged": [], "not_found": []}
+    for ticket_id in ids:
+        if ticket_id not in current_tags:
+            plan["not_found"].append(ticket_id)
+        elif tag_to_add in current_tags[ticket_id]:
+            plan["already_tagged"].append(ticket_id)
+        else:
+            plan["to_update"].append(ticket_id)
+    return plan
+
+def print_plan_summary(plan, tag_to_add):
+    total = sum(len(ids) for ids in plan.values())
+    print(f"Plan for tag '{tag_to_add}' across {total} tickets:")
+    print(f"  - Need the tag:      {len(plan['to_update'])}")
+    print(f"  - Already tagged:    {len(plan['already_tagged'])} (skipped)")
+    print(f"  - Not found:         {len(plan['not_found'])} (skipped)")
+    if plan["not_found"]:
+        print(f"    Not found: {plan['not_found']}")
 
 def load_tickets_and_tag_from_csv(filename):
     """
@@ -140,28 +299,27 @@ def load_tickets_and_tag_from_csv(filename):
     
     The CSV should be formatted with the first column as the ticket ID and the second as the Tag to add.
     If the second column in each row is empty, it will use the tag in the "tag" variable.
+    The file is streamed row by row: duplicate ticket IDs are dropped and rows without a
+    valid ID are reported and skipped.
 
     Args:
-      filename (str): The path to the CSV file.
+      filename (str): The path to the CSV file, or "-" to read from stdin.
 
     Returns:
-        tuple: A tuple containing a list of ticket IDs and the tag to add.
+        tuple: A tuple containing a compact array of unique ticket IDs and the tag to add.
                Returns None, None if the file is not found or is invalid.
     """
-    ticket_ids = []
     tag = ""
+
+    def pick_up_tag(row):
+        nonlocal tag
+        if len(row) > 1 and row[1].strip():
+            tag = row[1].strip()
+
     try:
-        with open(filename, 'r', newline='') as csvfile:
-            reader = csv.reader(csvfile)
-            next(reader, None)  # Skip the header row if there is one
-            for row in reader:
-                try:
-                  ticket_ids.append(row[0])
-                  if len(row)> 1:
-                    tag= row[1]
-                except IndexError:
-                  print(f"Invalid row in the CSV: {row}. Skipping.")
-                  continue
+        reader = IdReader(filename, column=0, on_row=pick_up_tag)
+        ticket_ids = reader.read_all()
+        reader.print_report()
         if not tag:
           print("Error: no tag found in the CSV")
           return None, None
@@ -176,11 +334,29 @@ def load_tickets_and_tag_from_csv(filename):
 
 # --- Main Execution ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add a tag to the Zendesk tickets listed in a CSV file.")
+    parser.add_argument("--dry-run", action="store_true", help="Only print which tickets would be updated")
+    parser.add_argument("source", nargs="?", help="CSV file to read instead of <script name>.csv, or - for stdin")
+    args = parser.parse_args()
+
     script_name = os.path.splitext(os.path.basename(__file__))[0]
-    csv_filename = f"{script_name}.csv"  # Name of your CSV file
+    csv_filename = args.source or f"{script_name}.csv"  # Name of your CSV file
     ticket_ids, tag = load_tickets_and_tag_from_csv(csv_filename)
     
     if ticket_ids and tag:
-        add_tag_to_tickets(ticket_ids, tag)
+        # Skip tickets a previous run already tagged, without looking them up again
+        journal = Journal()
+        pending_ids = journal.pending(f"add_tag:{tag}", ticket_ids)
+        if len(pending_ids) < len(ticket_ids):
+            print(f"Skipping {len(ticket_ids) - len(pending_ids)} tickets tagged in a previous run.")
+        plan = plan_tag_changes(pending_ids, tag)
+        if plan is not None:
+            print_plan_summary(plan, tag)
+            if args.dry_run:
+                print("Dry run: no tickets were updated.")
+            elif plan["to_update"]:
+                add_tag_to_tickets(plan["to_update"], tag, journal)
+            else:
+                print("Nothing to do: every ticket already has the tag.")
     else:
         print("Failed to load data from CSV, check for any error.")
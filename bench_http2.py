@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# bench_http2.py
+"""
+Compares the pooled HTTP/1.1 session with the HTTP/2 transport locally.
+
+Two stand-in servers run on localhost and answer every request with the
+same JSON page after a fixed delay (the API's server time): a threaded
+HTTP/1.1 server, and an HTTP/2 server (h2, cleartext with prior knowledge,
+so no certificate is needed). The same number of worker threads then
+fetch through each client:
+
+    http/1.1   requests.Session with the HTTPAdapter pool zendesk_client uses
+    http/2     http2_transport.Http2Session (httpx, http2=True)
+
+For each it prints requests per second, latency percentiles and how many
+TCP connections the server had to accept. Locally there is no TLS, so the
+handshakes HTTP/2 saves against the real API are not part of the numbers.
+
+Usage:
+    python bench_http2.py
+    python bench_http2.py --requests 2000 --concurrency 200 --delay 0.1 --body-kb 50
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import http2_transport
+from zendesk_client import POOL_SIZE
+
+
+def make_body(size_kb):
+    """A page of tickets of roughly size_kb."""
+    ticket = {"id": 0, "subject": "Cannot process payment", "status": "open", "tags": ["billing", "vip"]}
+    count = max(1, size_kb * 1024 // len(json.dumps(ticket)))
+    tickets = [dict(ticket, id=i) for i in range(count)]
+    return json.dumps({"tickets": tickets, "meta": {"has_more": False}}).encode("utf-8")
+
+
+class ConnectionCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self):
+        with self._lock:
+            self.count += 1
+
+
+def start_http1_server(body, delay, counter):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            counter.add()
+            super().setup()
+
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class _H2Connection:
+    """One HTTP/2 client connection on the stand-in server."""
+
+    def __init__(self, reader, writer, body, delay):
+        import h2.config
+        import h2.connection
+
+        self.reader, self.writer = reader, writer
+        self.body, self.delay = body, delay
+        self.conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        self.window_open = asyncio.Event()
+
+    async def run(self):
+        import h2.events
+
+        self.conn.initiate_connection()
+        await self.flush()
+        while True:
+            data = await self.reader.read(65536)
+            if not data:
+                break
+            for event in self.conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    asyncio.ensure_future(self.respond(event.stream_id))
+                elif isinstance(event, h2.events.WindowUpdated):
+                    self.window_open.set()
+            await self.flush()
+        self.writer.close()
+
+    async def flush(self):
+        self.writer.write(self.conn.data_to_send())
+        await self.writer.drain()
+
+    async def respond(self, stream_id):
+        await asyncio.sleep(self.delay)
+        self.conn.send_headers(stream_id, [
+            (":status", "200"), ("content-type", "application/json"), ("content-length", str(len(self.body))),
+        ])
+        sent = 0
+        while sent < len(self.body):
+            size = min(self.conn.local_flow_control_window(stream_id), self.conn.max_outbound_frame_size,
+                       len(self.body) - sent)
+            if size <= 0:
+                # Wait for the client to open the flow-control window
+                self.window_open.clear()
+                await self.flush()
+                await self.window_open.wait()
+                continue
+            self.conn.send_data(stream_id, self.body[sent:sent + size])
+            sent += size
+        self.conn.end_stream(stream_id)
+        await self.flush()
+
+
+def start_http2_server(body, delay, counter):
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    address = {}
+
+    async def handle(reader, writer):
+        counter.add()
+        await _H2Connection(reader, writer, body, delay).run()
+
+    async def serve():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=1024)
+        address["port"] = server.sockets[0].getsockname()[1]
+        started.set()
+        async with server:
+            await server.serve_forever()
+
+    threading.Thread(target=loop.run_until_complete, args=(serve(),), daemon=True).start()
+    started.wait()
+    return f"http://127.0.0.1:{address['port']}"
+
+
+def run_clients(session, url, total, concurrency):
+    latencies = []
+
+    def fetch(_):
+        started = time.perf_counter()
+        response = session.get(url)
+        response.raise_for_status()
+        response.json()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(fetch, range(total)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "seconds": elapsed,
+        "per_second": total / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def print_result(name, result, connections):
+    print(f"  {name:<9} {result['per_second']:>8.0f} req/s  p50 {result['p50']:>6.0f} ms  "
+          f"p95 {result['p95']:>6.0f} ms  {connections:>5} connections  ({result['seconds']:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/1.1 pool vs HTTP/2 multiplexing against local stand-ins.")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100, help="Requests in flight (worker threads)")
+    parser.add_argument("--delay", type=float, default=0.05, help="Simulated server time per request, seconds")
+    parser.add_argument("--body-kb", type=int, default=20, help="Response size")
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE, help="Connections kept per client")
+    args = parser.parse_args()
+
+    if not http2_transport.AVAILABLE:
+        raise SystemExit('httpx with HTTP/2 support is required: pip install "httpx[http2]"')
+
+    body = make_body(args.body_kb)
+    print(f"{args.requests} requests, {args.concurrency} in flight, {args.delay * 1000:.0f} ms server time, "
+          f"{len(body) // 1024} KB responses, pool size {args.pool_size}\n")
+
+    http1_connections = ConnectionCounter()
+    _, http1_url = start_http1_server(body, args.delay, http1_connections)
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=args.pool_size, pool_maxsize=args.pool_size))
+    print_result("http/1.1", run_clients(session, http1_url, args.requests, args.concurrency),
+                 http1_connections.count)
+
+    http2_connections = ConnectionCounter()
+    http2_url = start_http2_server(body, args.delay, http2_connections)
+    # Cleartext HTTP/2 needs prior knowledge; against the API, TLS negotiates it (ALPN)
+    session = http2_transport.Http2Session(max_connections=args.pool_size, http1=False)
+    print_result("http/2", run_clients(session, http2_url, args.requests, args.concurrency),
+                 http2_connections.count)
+    session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# bench_json_codec.py
+"""
+Compares the standard library json module with json_codec on export pages.
+
+Pass one or more recorded API responses (e.g. a saved page of
+/incremental/tickets/cursor.json). Without any, a synthetic 1,000-ticket
+page shaped like the incremental export is used.
+
+Usage:
+    python bench_json_codec.py
+    python bench_json_codec.py recorded_page_1.json recorded_page_2.json --key tickets
+"""
+
+import argparse
+import json
+import random
+import time
+
+import json_codec
+
+# The columns tickets_missing_category.py writes out
+TICKET_FIELDS = (
+    "url", "id", "created_at", "updated_at", "type", "subject", "description", "priority",
+    "status", "organization_id", "tags", "custom_fields", "satisfaction_rating", "fields",
+    "from_messaging_channel",
+)
+
+
+def synthetic_page(count=1000):
+    random.seed(0)
+    tickets = []
+    for i in range(count):
+        tickets.append({
+            "url": f"https://example.zendesk.com/api/v2/tickets/{i}.json",
+            "id": i,
+            "external_id": None,
+            "via": {"channel": "email", "source": {"from": {"address": "a@example.com"}, "to": {}, "rel": None}},
+            "created_at": "2024-01-01T00:00:00Z",
+            "updated_at": "2024-01-02T00:00:00Z",
+            "type": random.choice(["incident", "question", "problem"]),
+            "subject": "Cannot process payment " * 2,
+            "raw_subject": "Cannot process payment " * 2,
+            "description": "Lorem ipsum dolor sit amet. " * 40,
+            "priority": random.choice(["low", "normal", "high"]),
+            "status": random.choice(["open", "pending", "solved"]),
+            "requester_id": 1000 + i,
+            "submitter_id": 1000 + i,
+            "assignee_id": 42,
+            "organization_id": 500 + i % 50,
+            "group_id": 7,
+            "collaborator_ids": [],
+            "follower_ids": [],
+            "email_cc_ids": [],
+            "tags": ["billing", "priority_customer", f"tag_{i % 20}"],
+            "custom_fields": [{"id": 360000000000 + n, "value": f"value_{n}"} for n in range(25)],
+            "fields": [{"id": 360000000000 + n, "value": f"value_{n}"} for n in range(25)],
+            "satisfaction_rating": {"score": "unoffered"},
+            "sharing_agreement_ids": [],
+            "brand_id": 1,
+            "allow_channelback": False,
+            "allow_attachments": True,
+            "from_messaging_channel": False,
+        })
+    return json.dumps({"tickets": tickets, "after_url": None, "end_of_stream": True}).encode("utf-8")
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON decoding/encoding backends.")
+    parser.add_argument("payloads", nargs="*", help="Recorded API response files")
+    parser.add_argument("--key", default="tickets", help="Record list key in the payloads")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    payloads = []
+    for path in args.payloads:
+        with open(path, "rb") as f:
+            payloads.append(f.read())
+    if not payloads:
+        payloads = [synthetic_page()]
+
+    size_mb = sum(len(p) for p in payloads) / 1e6
+    decoded = [json.loads(p) for p in payloads]
+    print(f"Backend: {json_codec.BACKEND}, {len(payloads)} payload(s), {size_mb:.1f} MB")
+
+    results = [
+        ("decode (stdlib json)", lambda: [json.loads(p) for p in payloads]),
+        ("decode (json_codec)", lambda: [json_codec.loads(p) for p in payloads]),
+        ("decode only needed fields", lambda: [json_codec.decode_records(p, args.key, TICKET_FIELDS) for p in payloads]),
+        ("encode (stdlib json)", lambda: [json.dumps(d) for d in decoded]),
+        ("encode (json_codec)", lambda: [json_codec.dumps(d) for d in decoded]),
+    ]
+    baseline = {}
+    for name, func in results:
+        elapsed = best_of(func, args.repeat)
+        kind = name.split()[0]
+        baseline.setdefault(kind, elapsed)
+        print(f"  {name:<28} {elapsed * 1000:8.1f} ms  {baseline[kind] / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# cassette.py
+"""
+Record a script's API traffic once, then replay it offline.
+
+In record mode every HTTP request made through requests (by any script) is
+sent as usual and the response is appended to a gzip-compressed cassette
+file (JSON Lines). In replay mode no network calls are made: each request
+is answered from the cassette, either at full speed or with the latency
+that was recorded, and the rate limiter is switched off. Output format,
+transform and writer changes can then be iterated on and benchmarked
+against the same data, repeatably.
+
+Only the method, URL, request body, status, response headers and body are
+stored; credentials are never written to the cassette. Cassettes still
+contain ticket data, so treat them like any other export.
+
+Usage:
+    python cassette.py record voc.cassette.gz "VOC Tickets.py"
+    python cassette.py replay voc.cassette.gz "VOC Tickets.py"
+    python cassette.py replay --realtime voc.cassette.gz fetch_tickets_advanced.py
+
+Or from the environment (.env), for scripts built on zendesk_client or output_writer:
+    ZENDESK_CASSETTE=voc.cassette.gz
+    ZENDESK_CASSETTE_MODE=record         # or replay, replay-realtime
+"""
+
+import argparse
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+
+import requests
+from dotenv import load_dotenv
+from requests.sessions import Session
+from requests.structures import CaseInsensitiveDict
+
+import rate_limiter
+
+MODES = ("record", "replay", "replay-realtime")
+
+_installed = None
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """A replayed run made a request that was not recorded."""
+
+
+def _request_key(method, url, body):
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest() if body else ""
+    return f"{method.upper()} {url} {digest}"
+
+
+def _prepare(session, method, url, kwargs):
+    """Builds the request exactly as Session.request would, to match recorded calls."""
+    request = requests.Request(
+        method=method.upper(),
+        url=url,
+        headers=kwargs.get("headers"),
+        files=kwargs.get("files"),
+        data=kwargs.get("data") or {},
+        json=kwargs.get("json"),
+        params=kwargs.get("params") or {},
+        auth=kwargs.get("auth"),
+        cookies=kwargs.get("cookies"),
+    )
+    return session.prepare_request(request)
+
+
+class Recorder:
+    def __init__(self, path, send):
+        self.path = path
+        self._send = send
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self.count = 0
+        atexit.register(self.close)
+
+    def request(self, session, method, url, **kwargs):
+        prepared = _prepare(session, method, url, kwargs)
+        started = time.perf_counter()
+        response = self._send(session, method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+
+        content = response.content
+        try:
+            body, encoding = content.decode("utf-8"), "text"
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode("ascii"), "base64"
+        entry = {
+            "key": _request_key(prepared.method, prepared.url, prepared.body),
+            "method": prepared.method,
+            "url": response.url,
+            "status": response.status_code,
+            "headers": dict(response.headers),
+            "body": body,
+            "encoding": encoding,
+            "elapsed": round(elapsed, 4),
+        }
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()  # Keep the cassette readable if the run is killed
+            self.count += 1
+        return response
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+                print(f"Recorded {self.count} requests to {self.path}", file=sys.stderr)
+
+
+class Player:
+    def __init__(self, path, realtime=False):
+        self.path = path
+        self.realtime = realtime
+        self._lock = threading.Lock()
+        self._responses = defaultdict(deque)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Torn final line from an interrupted recording
+                self._responses[entry["key"]].append(entry)
+        rate_limiter.disable()
+
+    def _next_entry(self, key):
+        with self._lock:
+            entries = self._responses.get(key)
+            if not entries:
+                return None
+            # Repeated identical requests are answered in recorded order; the last answer sticks
+            return entries.popleft() if len(entries) > 1 else entries[0]
+
+    def request(self, session, method, url, **kwargs):
+        prepared = _prepare(session, method, url, kwargs)
+        entry = self._next_entry(_request_key(prepared.method, prepared.url, prepared.body))
+        if entry is None:
+            raise CassetteMiss(f"{prepared.method} {prepared.url} is not in cassette {self.path}")
+        if self.realtime:
+            time.sleep(entry["elapsed"])
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.headers.pop("Content-Encoding", None)  # The body is stored decoded
+        if entry["encoding"] == "base64":
+            response._content = base64.b64decode(entry["body"])
+        else:
+            response._content = entry["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = entry["url"]
+        response.request = prepared
+        response.elapsed = timedelta(seconds=entry["elapsed"])
+        response.reason = ""
+        return response
+
+
+def install(path, mode):
+    """Routes every requests call in this process through the cassette."""
+    global _installed
+    if mode not in MODES:
+        raise ValueError(f"Unknown cassette mode '{mode}'. Use one of: {', '.join(MODES)}")
+    if _installed is not None:
+        return _installed
+    if mode == "record":
+        _installed = Recorder(path, Session.request)
+    else:
+        _installed = Player(path, realtime=mode == "replay-realtime")
+
+    def request(session, method, url, **kwargs):
+        return _installed.request(session, method, url, **kwargs)
+
+    Session.request = request
+    return _installed
+
+
+def installed():
+    """True once a cassette is recording or replaying in this process."""
+    return _installed is not None
+
+
+def install_from_env():
+    """Installs the cassette named in ZENDESK_CASSETTE, if any."""
+    load_dotenv(".env")
+    path = os.getenv("ZENDESK_CASSETTE")
+    if path:
+        install(path, os.getenv("ZENDESK_CASSETTE_MODE", "replay"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay a script's Zendesk API traffic.")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("--realtime", action="store_true", help="Replay with the recorded latencies")
+    parser.add_argument("cassette", help="Cassette file, e.g. run.cassette.gz")
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    mode = "replay-realtime" if args.mode == "replay" and args.realtime else args.mode
+    install(args.cassette, mode)
+    sys.argv = [args.script] + args.args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    runpy.run_path(args.script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    # Run from the imported module so the scripts share the installed cassette
+    import cassette
+
+    cassette.main()
@@ -1,6 +1,10 @@
 import requests
 import csv
 import os
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Replace these with your Zendesk account details
 ZENDESK_SUBDOMAIN = os.getenv('ZENDESK_SUBDOMAIN')
@@ -2,8 +2,17 @@
 
 import os
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 import requests
+import sys
+from journal import Journal
+from id_input import IdReader
+from adaptive_concurrency import MAXIMUM, AdaptiveConcurrency, Throttled
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Load the environment variables from zd.env
 load_dotenv(".env")
@@ -16,7 +25,9 @@ ZENDESK_TOKEN = os.getenv("ZENDESK_API_TOKEN")
 # Construct the base URL
 base_url = f"https://{ZENDESK_SUBDOMAIN}.zendesk.com/api/v2"
 
-# List of ticket IDs to delete
+# List of ticket IDs to delete. To delete the IDs in a file instead, pass it on the
+# command line (one ID per line or a CSV with the ID in the first column, - for stdin):
+#     python delete_tickets.py purge_list.csv
 ticket_ids = [
     85730, 85731, 85732, 85733, 85734, 85735, 85736, 85737, 85740, 85741
 ]
@@ -26,21 +37,58 @@ headers = {
     "Content-Type": "application/json"
 }
 
-# Use basic authentication
+# Use basic authentication, with one session so parallel deletes reuse connections
 auth = HTTPBasicAuth(f"{ZENDESK_EMAIL}/token", ZENDESK_TOKEN)
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_maxsize=MAXIMUM))
+
+# Journal operation name for completed deletions
+JOURNAL_OP = "delete_ticket"
 
-def delete_ticket(ticket_id):
+def delete_ticket(ticket_id, journal=None):
+    """Deletes one ticket. Returns True once it is gone; raises Throttled on 429."""
     url = f"{base_url}/tickets/{ticket_id}.json"
-    response = requests.delete(url, auth=auth, headers=headers)
+    response = session.delete(url, auth=auth, headers=headers)
+    if response.status_code == 429:
+        raise Throttled(response.headers.get("Retry-After"))
     if response.status_code == 204:
         print(f"Ticket ID {ticket_id} deleted successfully.")
+    elif response.status_code == 404:
+        print(f"Ticket ID {ticket_id} was already deleted.")
     else:
         print(
             f"Failed to delete Ticket ID {ticket_id}: "
             f"{response.status_code} - {response.text}"
         )
+        return False
+    if journal is not None:
+        journal.record(JOURNAL_OP, [ticket_id])
+    return True
 
 if __name__ == "__main__":
-    # Iterate over the ticket IDs and delete each one
-    for ticket_id in ticket_ids:
-        delete_ticket(ticket_id)
+    journal = Journal()
+    reader = IdReader(sys.argv[1]) if len(sys.argv) > 1 else None
+    batches = reader.batches() if reader else [ticket_ids]
+
+    skipped = 0
+
+    def pending_ids():
+        global skipped
+        for batch in batches:
+            # Skip tickets a previous run already deleted
+            pending = journal.pending(JOURNAL_OP, batch)
+            skipped += len(batch) - len(pending)
+            yield from pending
+
+    # Delete in parallel, as many at a time as Zendesk keeps up with. The
+    # journal is written here, from one thread, as each delete completes.
+    controller = AdaptiveConcurrency("delete_tickets")
+    for ticket_id, deleted in controller.map(delete_ticket, pending_ids()):
+        if deleted:
+            journal.record(JOURNAL_OP, [ticket_id])
+    controller.report()
+
+    if reader:
+        reader.print_report()
+    if skipped:
+        print(f"Skipped {skipped} tickets already deleted in a previous run.")
@@ -6,6 +6,12 @@ import pandas as pd
 from datetime import datetime
 import time
 from dotenv import load_dotenv
+from journal import Journal
+from id_input import IdReader
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Load environment variables from .env file
 load_dotenv(".env")
@@ -16,6 +22,9 @@ EMAIL = os.getenv("ZENDESK_EMAIL")
 API_TOKEN = os.getenv("ZENDESK_API_TOKEN")
 BASE_URL = f"https://{SUBDOMAIN}.zendesk.com/api/v2"
 
+# Journal operation name for completed deletions
+JOURNAL_OP = "delete_trigger"
+
 def delete_triggers_from_csv(csv_file='delete_triggers.csv'):
     """
     Delete triggers from Zendesk based on Trigger IDs provided in a CSV file.
@@ -31,6 +40,10 @@ def delete_triggers_from_csv(csv_file='delete_triggers.csv'):
           Trigger_deletion
           12345678
           87654321
+
+        - IDs are read in batches as the file is streamed, so deletion starts right
+          away even for very large files. Duplicate IDs are deleted once and rows
+          that are not a valid ID are reported at the end.
     """
     # Create the authentication string
     auth = f"{EMAIL}/token:{API_TOKEN}"
@@ -42,56 +55,83 @@ def delete_triggers_from_csv(csv_file='delete_triggers.csv'):
         'Content-Type': 'application/json'
     }
 
-    # Read trigger IDs from CSV
-    try:
-        df = pd.read_csv(csv_file)
-        trigger_ids = df['Trigger_deletion'].astype(str).tolist()
-    except Exception as e:
-        print(f"Error reading CSV file: {e}")
-        return
+    # Stream trigger IDs from the CSV, 100 at a time, dropping duplicates and bad rows
+    reader = IdReader(csv_file, column='Trigger_deletion')
+    journal = Journal()
+    skipped = 0
 
-    print(f"Found {len(trigger_ids)} triggers to delete")
-    
     # Create log file for results
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     log_filename = f'trigger_deletion_log_{timestamp}.csv'
     
     results = []
-    
-    # Delete each trigger
-    for trigger_id in trigger_ids:
-        url = f"{BASE_URL}/triggers/{trigger_id}"
-        
-        try:
-            print(f"Attempting to delete trigger {trigger_id}...")
-            response = requests.delete(url, headers=headers)
-            
-            result = {
-                'Trigger_deletion': trigger_id,
-                'Status': 'Success' if response.status_code == 204 else 'Failed',
-                'Response Code': response.status_code,
-                'Error Message': response.text if response.status_code != 204 else ''
-            }
-            
-            if response.status_code == 204:
-                print(f"Successfully deleted trigger {trigger_id}")
-            else:
-                print(f"Failed to delete trigger {trigger_id}. Status code: {response.status_code}")
-                print(f"Error: {response.text}")
+    batches = reader.batches()
+
+    try:
+        while True:
+            # Only reading the CSV is handled here; a failed journal write stops the run
+            try:
+                batch = next(batches)
+            except StopIteration:
+                break
+            except (OSError, ValueError) as e:
+                print(f"Error reading CSV file: {e}")
+                break
+
+            # Skip triggers a previous run already deleted
+            trigger_ids = journal.pending(JOURNAL_OP, batch)
+            skipped += len(batch) - len(trigger_ids)
+
+            # Delete each trigger
+            for trigger_id in trigger_ids:
+                url = f"{BASE_URL}/triggers/{trigger_id}"
                 
-            results.append(result)
-            
-            # Add a small delay to prevent rate limiting
-            time.sleep(0.5)
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Error deleting trigger {trigger_id}: {e}")
-            results.append({
-                'Trigger_deletion': trigger_id,
-                'Status': 'Failed',
-                'Response Code': 'Error',
-                'Error Message': str(e)
-            })
+                try:
+                    print(f"Attempting to delete trigger {trigger_id}...")
+                    response = requests.delete(url, headers=headers)
+                    
+                    result = {
+                        'Trigger_deletion': trigger_id,
+                        'Status': 'Success' if response.status_code == 204 else 'Failed',
+                        'Response Code': response.status_code,
+                        'Error Message': response.text if response.status_code != 204 else ''
+                    }
+                    # Logged before the journal write, so a deleted trigger is never missing from the log
+                    results.append(result)
+                    
+                    if response.status_code == 204:
+                        print(f"Successfully deleted trigger {trigger_id}")
+                        journal.record(JOURNAL_OP, [trigger_id])
+                    elif response.status_code == 404:
+                        print(f"Trigger {trigger_id} was already deleted")
+                        journal.record(JOURNAL_OP, [trigger_id], detail="404")
+                    else:
+                        print(f"Failed to delete trigger {trigger_id}. Status code: {response.status_code}")
+                        print(f"Error: {response.text}")
+                    
+                    # Add a small delay to prevent rate limiting
+                    time.sleep(0.5)
+                    
+                except requests.exceptions.RequestException as e:
+                    print(f"Error deleting trigger {trigger_id}: {e}")
+                    results.append({
+                        'Trigger_deletion': trigger_id,
+                        'Status': 'Failed',
+                        'Response Code': 'Error',
+                        'Error Message': str(e)
+                    })
+    finally:
+        # Log what was done even when the run stops part-way
+        reader.print_report()
+        if skipped:
+            print(f"Skipped {skipped} triggers already deleted in a previous run")
+        save_results(results, log_filename)
+
+def save_results(results, log_filename):
+    """Writes the per-trigger results to log_filename and prints a summary."""
+    if not results:
+        print("Nothing left to delete")
+        return
     
     # Save results to CSV
     results_df = pd.DataFrame(results)
@@ -4,8 +4,14 @@ from requests.auth import HTTPBasicAuth
 import pandas as pd
 from time import sleep
 import sys
-import json
 from dotenv import load_dotenv
+import json_codec
+import output_writer
+import profiling
+from transform_pool import transform
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Load environment variables from .env file
 load_dotenv(".env")
@@ -42,7 +48,7 @@ def fetch_automations(max_automations=10):
         try:
             response = requests.get(url, auth=auth, headers=headers, params=params)
             response.raise_for_status()
-            data = response.json()
+            data = json_codec.decode_response(response)
 
             # Add automations from the current page
             for automation in data.get('automations', []):
@@ -80,8 +86,8 @@ def flatten_automation(automation):
     }
 
     # Add conditions and actions as JSON strings
-    flat_dict['conditions'] = json.dumps(automation.get('conditions', {}))
-    flat_dict['actions'] = json.dumps(automation.get('actions', []))
+    flat_dict['conditions'] = json_codec.dumps(automation.get('conditions', {}))
+    flat_dict['actions'] = json_codec.dumps(automation.get('actions', []))
 
     return flat_dict
 
@@ -95,18 +101,27 @@ def main():
         print("No automations found!")
         return
 
-    # Flatten the automation data
-    flattened_data = [flatten_automation(automation) for automation in automations]
+    # Flatten the automation data (in worker processes when ZENDESK_TRANSFORM_PROCESSES is set)
+    flattened_data = list(transform(automations, flatten_automation))
 
     # Convert to DataFrame and export to CSV
     df = pd.DataFrame(flattened_data)
 
     # Sort by position
-    df = df.sort_values('position')
+    with profiling.phase("pandas: sort_values"):
+        df = df.sort_values('position')
 
     # Export to CSV
     output_file = 'zendesk_automations.csv'
-    df.to_csv(output_file, index=False)
+    if output_writer.streaming_enabled():
+        # Compressed/sharded output configured in .env
+        with output_writer.open_export(output_file, fieldnames=list(df.columns)) as writer:
+            writer.writerows(df.astype(object).where(df.notna(), None).to_dict("records"))
+        print(f"Successfully exported {len(automations)} automations to {len(writer.shards)} shard(s), "
+              f"see {output_file}.manifest.json")
+        return
+    with profiling.phase("write"):
+        df.to_csv(output_file, index=False)
     print(f"Successfully exported {len(automations)} automations to {output_file}")
 
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# fetch_comments_bulk.py
+"""
+Exports ticket comments in bulk.
+
+By default the script reads the incremental ticket event export with
+`include=comment_events`, which returns up to 1,000 audit events per
+request along with their comments. Every comment on every ticket changed
+in the window is collected in a handful of requests instead of one
+request per ticket.
+
+For a short, targeted list of tickets, pass --ticket-ids; each ticket's
+comments are then fetched one ticket at a time, following every page so
+long threads are not cut off.
+
+Usage:
+    python fetch_comments_bulk.py --start 2024-01-01 --end 2024-02-01
+    python fetch_comments_bulk.py --ticket-ids 82294 86472
+
+Output is a JSON file keyed by ticket ID, in the same shape as
+fetch_tickets.py: {"<ticket_id>": {"comments": [...], "count": n}}.
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+
+import output_writer
+import profiling
+from zendesk_client import iter_pages, paginate
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
+
+
+def _to_timestamp(date_string):
+    return int(datetime.strptime(date_string, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+def harvest_comments_incremental(start_time, end_time=None):
+    """
+    Collects comments for every ticket updated between start_time and end_time.
+
+    Args:
+        start_time (int): Unix timestamp to start the export from.
+        end_time (int, optional): Unix timestamp to stop at. Defaults to now.
+
+    The export's time-based pages overlap, so an event at a page boundary
+    can be returned twice; comments are keyed by comment ID to drop repeats.
+
+    Returns:
+        dict: ticket_id -> list of comment dicts, oldest first.
+    """
+    comments = {}  # ticket_id -> {comment_id: comment}
+    params = {"start_time": start_time, "include": "comment_events"}
+
+    for page in iter_pages("/incremental/ticket_events.json", params=params):
+        for event in page.get("ticket_events", []):
+            if end_time is not None and event.get("timestamp", 0) > end_time:
+                return _as_lists(comments)
+            for child in event.get("child_events", []):
+                if child.get("event_type") != "Comment":
+                    continue
+                comments.setdefault(event["ticket_id"], {})[child.get("id")] = {
+                    "id": child.get("id"),
+                    "author_id": child.get("author_id"),
+                    "body": child.get("body"),
+                    "html_body": child.get("html_body"),
+                    "public": child.get("public"),
+                    "attachments": child.get("attachments", []),
+                    "created_at": event.get("created_at"),
+                }
+        print(f"Collected comments for {len(comments)} tickets so far...")
+
+    return _as_lists(comments)
+
+
+def _as_lists(comments):
+    return {ticket_id: list(by_id.values()) for ticket_id, by_id in comments.items()}
+
+
+def fetch_ticket_comments(ticket_id):
+    """Fetches every comment on a single ticket, following all pages."""
+    return list(paginate(f"/tickets/{ticket_id}/comments.json", "comments", {"page[size]": 100}))
+
+
+def harvest_comments_for_tickets(ticket_ids):
+    """Fetches complete comment threads for a targeted list of tickets."""
+    comments = {}
+    for ticket_id in ticket_ids:
+        try:
+            comments[ticket_id] = fetch_ticket_comments(ticket_id)
+        except Exception as e:
+            print(f"Error fetching comments for ticket {ticket_id}: {e}")
+    return comments
+
+
+def save_comments_to_json(comments, file_name="ticket_comments.json"):
+    if output_writer.streaming_enabled():
+        # Compressed/sharded JSON Lines, one ticket per line
+        with output_writer.open_export(os.path.splitext(file_name)[0] + ".jsonl") as writer:
+            for ticket_id, ticket_comments in comments.items():
+                writer.write({"ticket_id": ticket_id, "comments": ticket_comments, "count": len(ticket_comments)})
+        print(f"Comments for {len(comments)} tickets have been saved to {len(writer.shards)} shard(s)")
+        return
+
+    output = {
+        str(ticket_id): {"comments": ticket_comments, "count": len(ticket_comments)}
+        for ticket_id, ticket_comments in comments.items()
+    }
+    with open(file_name, "w") as f:
+        json.dump(output, f)
+    print(f"Comments for {len(output)} tickets have been saved to {file_name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Zendesk ticket comments in bulk.")
+    parser.add_argument("--start", help="Start date (YYYY-MM-DD) for the incremental export")
+    parser.add_argument("--end", help="End date (YYYY-MM-DD). Defaults to now")
+    parser.add_argument("--ticket-ids", nargs="+", type=int, help="Fetch these tickets one by one instead")
+    parser.add_argument("--output", default="ticket_comments.json")
+    args = parser.parse_args()
+
+    if args.ticket_ids:
+        comments = harvest_comments_for_tickets(args.ticket_ids)
+    elif args.start:
+        end_time = _to_timestamp(args.end) if args.end else None
+        comments = harvest_comments_incremental(_to_timestamp(args.start), end_time)
+    else:
+        parser.error("Pass either --start or --ticket-ids")
+
+    save_comments_to_json(comments, args.output)
+
+
+if __name__ == "__main__":
+    main()
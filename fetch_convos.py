@@ -1,4 +1,8 @@
 import requests
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Hardcoded Zendesk API credentials
 SUBDOMAIN = "spreedly"
@@ -1,96 +1,88 @@
 #!/usr/bin/env python3
 # fetch_orgs.py
 
-import os
 import csv
-import requests
-from dotenv import load_dotenv
-from requests.auth import HTTPBasicAuth
+from itertools import islice
 
-# Load environment variables from zd.env
-load_dotenv('.env')
+import output_writer
+import profiling
+from transform_pool import transform
+from zendesk_client import paginate
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 def get_organizations(limit=10):
     """
-    Fetch up to `limit` organizations from Zendesk.
-    For unlimited, remove the slicing or (better yet) implement pagination
-    by following `next_page` links in the response.
-    """
-    email_address = os.getenv('ZENDESK_EMAIL')
-    api_token = os.getenv('ZENDESK_API_TOKEN')   
-    subdomain = os.getenv('ZENDESK_SUBDOMAIN')
-
-    if not all([email_address, api_token, subdomain]):
-        print(
-            "Your zd.env file is missing something. Check that you have "
-            "ZENDESK_EMAIL, ZENDESK_API_TOKEN, and ZENDESK_SUBDOMAIN configured."
-        )
-        return []
+    Fetch up to `limit` organizations from Zendesk with cursor pagination,
+    which has no 100-page cap and retries 429s through the shared rate
+    limiter. Pass limit=None to fetch every organization in the instance.
 
-    url = f'https://{subdomain}.zendesk.com/api/v2/organizations'
-    headers = {"Content-Type": "application/json"}
-    auth = HTTPBasicAuth(f'{email_address}/token', api_token)
-
-    # Request the first page
-    response = requests.get(url, headers=headers, auth=auth)
-    if response.status_code != 200:
-        print(f"Error fetching orgs: {response.status_code} - {response.text}")
-        return []
-
-    data = response.json()
-    organizations = data.get("organizations", [])
+    Raises:
+        requests.exceptions.HTTPError: If a page cannot be fetched.
+    """
+    page_size = 100 if limit is None else max(1, min(limit, 100))
+    organizations = paginate("/organizations", "organizations", {"page[size]": page_size})
+    return list(islice(organizations, limit))
 
-    # Limit to 10 for demonstration
-    organizations = organizations[:limit]
+def org_to_row(org):
+    """
+    Builds the CSV row for one organization.
+    """
+    fields = org.get("organization_fields", {})
+    return [
+        org.get("id"),
+        org.get("name"),
+        org.get("created_at"),
+        org.get("updated_at"),
+        ", ".join(org.get("domain_names", [])),
+        fields.get("account_classification"),
+        fields.get("account_owner_sf_"),
+        fields.get("account_type_sf_"),
+        fields.get("billing_org_id"),
+        fields.get("salesforce_account_stage"),
+        fields.get("service_level"),
+        fields.get("sfdc_account_id"),
+        fields.get("sync_to_zendesk"),
+        fields.get("webste"),
+    ]
 
-    return organizations
+# Header row
+ORG_HEADERS = [
+    "ID",
+    "Name",
+    "Created At",
+    "Updated At",
+    "Domain Names",
+    "Account Classification",
+    "Account Owner SF",
+    "Account Type SF",
+    "Billing Org ID",
+    "Salesforce Account Stage",
+    "Service Level",
+    "SFDC Account ID",
+    "Sync To Zendesk",
+    "Website"
+]
 
 def write_orgs_to_csv(organizations, filename='zendesk_orgs.csv'):
     """
-    Writes the given organizations to a CSV file.
+    Writes the given organizations to a CSV file, or to compressed/sharded
+    output through output_writer when ZENDESK_OUTPUT_COMPRESSION or
+    ZENDESK_SHARD_* is set.
     """
+    # Each organization's row is built in worker processes when
+    # ZENDESK_TRANSFORM_PROCESSES is set
+    rows = transform(organizations, org_to_row)
+    if output_writer.streaming_enabled():
+        with output_writer.open_export(filename, fieldnames=ORG_HEADERS) as writer:
+            writer.writerows(dict(zip(ORG_HEADERS, row)) for row in rows)
+        return
+
     with open(filename, mode='w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
-
-        # Header row
-        headers = [
-            "ID",
-            "Name",
-            "Created At",
-            "Updated At",
-            "Domain Names",
-            "Account Classification",
-            "Account Owner SF",
-            "Account Type SF",
-            "Billing Org ID",
-            "Salesforce Account Stage",
-            "Service Level",
-            "SFDC Account ID",
-            "Sync To Zendesk",
-            "Website"
-        ]
-        writer.writerow(headers)
-
-        # Write each organization's row
-        for org in organizations:
-            fields = org.get("organization_fields", {})
-            row = [
-                org.get("id"),
-                org.get("name"),
-                org.get("created_at"),
-                org.get("updated_at"),
-                ", ".join(org.get("domain_names", [])),
-                fields.get("account_classification"),
-                fields.get("account_owner_sf_"),
-                fields.get("account_type_sf_"),
-                fields.get("billing_org_id"),
-                fields.get("salesforce_account_stage"),
-                fields.get("service_level"),
-                fields.get("sfdc_account_id"),
-                fields.get("sync_to_zendesk"),
-                fields.get("webste"),
-            ]
-            writer.writerow(row)
+        writer.writerow(ORG_HEADERS)
+        writer.writerows(rows)
 
 def main():
     # Step 1: Get the orgs
@@ -100,7 +92,7 @@ def main():
         write_orgs_to_csv(organizations, 'zendesk_orgs.csv')
         print("All done! Check 'zendesk_orgs.csv' for your results.")
     else:
-        print("No organizations returned or an error occurred.")
+        print("No organizations returned.")
 
 if __name__ == '__main__':
     main()
@@ -2,6 +2,10 @@ import os
 import requests
 from requests.auth import HTTPBasicAuth
 from dotenv import load_dotenv
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 def get_organization_count():
     """Fetches the total count of organizations from Zendesk."""
@@ -3,6 +3,10 @@ from requests.auth import HTTPBasicAuth
 import os
 from dotenv import load_dotenv
 import json
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Load environment variables from .env file
 load_dotenv()
@@ -4,6 +4,11 @@ import os
 import csv
 from datetime import datetime
 from dotenv import load_dotenv
+import output_writer
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,33 +25,53 @@ headers = {
 # Use basic authentication
 auth = HTTPBasicAuth(f'{EMAIL}/token', API_TOKEN)
 
-response = requests.request(
-    "GET",
-    url,
-    auth=auth,
-    headers=headers
-)
+# Follow cursor pagination so every tag is exported, not just the first page
+all_tags = []
+params = {"page[size]": 100}
+
+while url:
+    response = requests.request(
+        "GET",
+        url,
+        auth=auth,
+        headers=headers,
+        params=params
+    )
+    if response.status_code != 200:
+        break
+
+    data = response.json()
+    all_tags.extend(data['tags'])
+
+    # The next link already carries the cursor and page size
+    params = None
+    url = data.get('links', {}).get('next') if data.get('meta', {}).get('has_more') else None
 
 # Process the response
 if response.status_code == 200:
-    tags = response.json()
-    print(f"Total tags found: {len(tags['tags'])}")
+    print(f"Total tags found: {len(all_tags)}")
     
     # Get the script name without .py extension and create filename with timestamp
     script_name = os.path.splitext(os.path.basename(__file__))[0]
     timestamp = datetime.now().strftime('%Y%m%d_%H%M')  # Removed seconds
     filename = f"{script_name}_{timestamp}.csv"
     
-    # Write to CSV
-    with open(filename, 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        # Write header
-        writer.writerow(['Tag Name', 'Count'])
-        # Write data
-        for tag in tags['tags']:
-            writer.writerow([tag['name'], tag['count']])
-    
-    print(f"\nData exported to {filename}")
+    if output_writer.streaming_enabled():
+        # Compressed/sharded output configured in .env
+        with output_writer.open_export(filename, fieldnames=['Tag Name', 'Count']) as writer:
+            writer.writerows({'Tag Name': tag['name'], 'Count': tag['count']} for tag in all_tags)
+        print(f"\nData exported to {len(writer.shards)} shard(s), see {filename}.manifest.json")
+    else:
+        # Write to CSV
+        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            # Write header
+            writer.writerow(['Tag Name', 'Count'])
+            # Write data
+            for tag in all_tags:
+                writer.writerow([tag['name'], tag['count']])
+
+        print(f"\nData exported to {filename}")
 else:
     print(f"Error: {response.status_code}")
     print(response.text)
@@ -3,6 +3,11 @@ import json
 import base64
 import os
 from dotenv import load_dotenv
+import output_writer
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Load environment variables from .env file
 load_dotenv()
@@ -28,11 +33,17 @@ for ticket_id in ticket_ids:
     headers = {"Authorization": f"Basic {auth_encoded}", "Content-Type": "application/json"}
 
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        # Follow every page so long threads aren't cut off after the first 100 comments
+        comments = []
+        while url:
+            response = requests.get(url, headers=headers)
+            response.raise_for_status()
+
+            comments_data = response.json()
+            comments.extend(comments_data.get("comments", []))
+            url = comments_data.get("next_page")
 
-        comments_data = response.json()
-        all_comments[ticket_id] = comments_data
+        all_comments[ticket_id] = {"comments": comments, "count": len(comments)}
 
     except requests.exceptions.RequestException as e:
         print(f"Error fetching comments for ticket {ticket_id}: {e}")
@@ -43,7 +54,14 @@ for ticket_id in ticket_ids:
 
 # Save all comments to a JSON file
 output_file = os.path.join(os.path.dirname(__file__), 'ticket_comments.json')
-with open(output_file, 'w') as f:
-    json.dump(all_comments, f, indent=4)
+if output_writer.streaming_enabled():
+    # Compressed/sharded JSON Lines, one ticket per line
+    output_file = os.path.splitext(output_file)[0] + '.jsonl'
+    with output_writer.open_export(output_file) as writer:
+        for ticket_id, comments_data in all_comments.items():
+            writer.write({"ticket_id": ticket_id, **comments_data})
+else:
+    with open(output_file, 'w') as f:
+        json.dump(all_comments, f, indent=4)
 
 print(f"Comments for all tickets have been saved to {output_file}")
\ No newline at end of file
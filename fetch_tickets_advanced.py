@@ -3,6 +3,12 @@ import json
 import base64
 import os
 from dotenv import load_dotenv
+import field_decoder
+import output_writer
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Load environment variables from .env file
 load_dotenv()
@@ -22,6 +28,7 @@ ticket_ids = [
 ]
 
 all_ticket_data = {}
+raw_custom_fields = {}  # ticket_id -> custom_fields, for ZENDESK_EXPAND_CUSTOM_FIELDS
 
 for ticket_id in ticket_ids:
     ticket_url = f"{BASE_URL}/tickets/{ticket_id}.json"
@@ -34,10 +41,15 @@ for ticket_id in ticket_ids:
         ticket_response.raise_for_status()
         ticket_data = ticket_response.json()["ticket"]
 
-        # Fetch ticket comments
-        comments_response = requests.get(comments_url, headers=headers)
-        comments_response.raise_for_status()
-        comments_data = comments_response.json()
+        # Fetch ticket comments, following every page
+        comments = []
+        while comments_url:
+            comments_response = requests.get(comments_url, headers=headers)
+            comments_response.raise_for_status()
+            comments_page = comments_response.json()
+            comments.extend(comments_page.get("comments", []))
+            comments_url = comments_page.get("next_page")
+        comments_data = {"comments": comments, "count": len(comments)}
 
         # Combine ticket details and comments
         all_ticket_data[ticket_id] = {
@@ -47,6 +59,7 @@ for ticket_id in ticket_ids:
             "organization_id": ticket_data.get("organization_id"),
             "comments": comments_data
         }
+        raw_custom_fields[ticket_id] = {"custom_fields": ticket_data.get("custom_fields")}
 
     except requests.exceptions.RequestException as e:
         print(f"Error fetching data for ticket {ticket_id}: {e}")
@@ -55,9 +68,22 @@ for ticket_id in ticket_ids:
     except Exception as e:
         print(f"An unexpected error occurred for ticket {ticket_id}: {e}")
 
+# Add the custom fields by name, with option display names (see field_decoder.py)
+if field_decoder.expansion_enabled() and all_ticket_data:
+    named = field_decoder.named_custom_fields([raw_custom_fields[ticket_id] for ticket_id in all_ticket_data])
+    for ticket_id, fields in zip(all_ticket_data, named):
+        all_ticket_data[ticket_id]["custom_fields"] = fields
+
 # Save all ticket data to a JSON file
 output_file = os.path.join(os.path.dirname(__file__), 'tickets_advanced.json')
-with open(output_file, 'w') as f:
-    json.dump(all_ticket_data, f, indent=4)
+if output_writer.streaming_enabled():
+    # Compressed/sharded JSON Lines, one ticket per line
+    output_file = os.path.splitext(output_file)[0] + '.jsonl'
+    with output_writer.open_export(output_file) as writer:
+        for ticket_id, ticket_data in all_ticket_data.items():
+            writer.write({"ticket_id": ticket_id, **ticket_data})
+else:
+    with open(output_file, 'w') as f:
+        json.dump(all_ticket_data, f, indent=4)
 
 print(f"Data for all tickets have been saved to {output_file}")
\ No newline at end of file
@@ -6,6 +6,12 @@ import csv
 from datetime import datetime
 import pandas as pd
 from dotenv import load_dotenv
+import json_codec
+import output_writer
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Load environment variables from .env file
 load_dotenv(".env")
@@ -45,7 +51,7 @@ def get_zendesk_triggers(export_to_csv=True):
         response.raise_for_status()
         
         # Parse the response
-        triggers = response.json()['triggers']
+        triggers = json_codec.decode_response(response)['triggers']
         
         # Print trigger details
         print(f"\nFound {len(triggers)} triggers:\n")
@@ -108,14 +114,23 @@ def export_triggers_to_csv(triggers):
             'Position': trigger['position'],
             'Created At': created_at,
             'Updated At': updated_at,
-            'Conditions': json.dumps(trigger['conditions']),
-            'Actions': json.dumps(trigger['actions'])
+            'Conditions': json_codec.dumps(trigger['conditions']),
+            'Actions': json_codec.dumps(trigger['actions'])
         }
         rows.append(row)
     
     try:
+        if output_writer.streaming_enabled():
+            # Compressed/sharded output configured in .env; the IDs are already
+            # strings, so the pandas clean-up pass is not needed
+            with output_writer.open_export(filename, fieldnames=headers) as writer:
+                writer.writerows(rows)
+            print(f"\nSuccessfully exported triggers to {len(writer.shards)} shard(s), "
+                  f"see {filename}.manifest.json")
+            return
+
         # Write to CSV
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        with profiling.phase("write"), open(filename, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=headers)
             writer.writeheader()
             for row in rows:
@@ -124,7 +139,8 @@ def export_triggers_to_csv(triggers):
         print(f"\nSuccessfully exported triggers to {filename}")
         
         # Clean up the CSV using pandas
-        clean_csv_formatting(filename)
+        with profiling.phase("pandas: clean_csv_formatting"):
+            clean_csv_formatting(filename)
         
     except IOError as e:
         print(f"Error writing to CSV file: {e}")
@@ -1,25 +1,59 @@
 import os
 import requests
-from requests.auth import HTTPBasicAuth
 import csv
 from dotenv import load_dotenv
+import output_writer
+import profiling
+from zendesk_client import request
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Load environment variables from .env file
 load_dotenv(".env")
 
 # Base URL for your Zendesk instance
 SUBDOMAIN = os.getenv("ZENDESK_SUBDOMAIN")
-EMAIL = os.getenv("ZENDESK_EMAIL")
-API_TOKEN = os.getenv("ZENDESK_API_TOKEN")
 BASE_URL = f"https://{SUBDOMAIN}.zendesk.com/api/v2"
 
 # Define desired user attributes (adjust as needed)
 user_attributes = ["id", "name", "email", "role"]
 
+def iter_users(max_users=10):
+    """
+    Yields up to `max_users` users from the Zendesk API, following `next_page` links.
+    Set max_users to None for unlimited users.
+    """
+    # Handle pagination (Zendesk API returns results in pages)
+    next_page = f"{BASE_URL}/users"  # Start with users endpoint
+    fetched_users = 0
+
+    while next_page and (max_users is None or fetched_users < max_users):
+        # Retries 429s through the shared rate limiter, up to zendesk_client.MAX_RETRIES times
+        try:
+            response = request("GET", next_page)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching users, stopping after {fetched_users}: {e}")
+            return
+        data = response.json()
+
+        # Extract user data from each page
+        for user in data.get("users", []):
+            if max_users is not None and fetched_users >= max_users:
+                break
+            yield user
+            fetched_users += 1
+
+        # Check for next page link
+        next_page = data.get("next_page")
+
 def fetch_users(max_users=10):
     """
     Fetch users from Zendesk API with an optional limit.
 
+    Writes zendesk_users.csv, or compressed/sharded output through
+    output_writer when ZENDESK_OUTPUT_COMPRESSION or ZENDESK_SHARD_* is set.
+
     Args:
         max_users (int, optional): Maximum number of users to fetch. Defaults to 10.
         Set to None for unlimited users.
@@ -27,31 +61,25 @@ def fetch_users(max_users=10):
     Returns:
         None
     """
-    with open('zendesk_users.csv', 'w', newline='') as csvfile:
-        csv_writer = csv.writer(csvfile)
-        csv_writer.writerow(user_attributes)  # Write header row
-
-        # Handle pagination (Zendesk API returns results in pages)
-        next_page = f"{BASE_URL}/users"  # Start with users endpoint
-        fetched_users = 0
-
-        while next_page and (max_users is None or fetched_users < max_users):
-            auth = HTTPBasicAuth(f'{EMAIL}/token', API_TOKEN)
-            response = requests.get(next_page, auth=auth)
-            data = response.json()
-
-            # Extract user data from each page
-            for user in data.get("users", []):
-                if max_users is not None and fetched_users >= max_users:
-                    break
-                user_data = [user.get(attribute) for attribute in user_attributes]
-                csv_writer.writerow(user_data)
+    output_file = 'zendesk_users.csv'
+    fetched_users = 0
+    if output_writer.streaming_enabled():
+        with output_writer.open_export(output_file, fieldnames=user_attributes) as writer:
+            for user in iter_users(max_users):
+                writer.write({attribute: user.get(attribute) for attribute in user_attributes})
                 fetched_users += 1
+        print(f"Fetched {fetched_users} user(s). Data exported to {len(writer.shards)} shard(s), "
+              f"see {output_file}.manifest.json")
+        return
 
-            # Check for next page link
-            next_page = data.get("next_page")
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        csv_writer = csv.writer(csvfile)
+        csv_writer.writerow(user_attributes)  # Write header row
+        for user in iter_users(max_users):
+            csv_writer.writerow([user.get(attribute) for attribute in user_attributes])
+            fetched_users += 1
 
-    print(f"Fetched {fetched_users} user(s). Data exported to 'zendesk_users.csv'")
+    print(f"Fetched {fetched_users} user(s). Data exported to '{output_file}'")
 
 # Main logic
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# field_decoder.py
+"""
+Decodes ticket custom fields into readable, named columns.
+
+The field index is built once from ticket_fields.json (written by
+ticket_fields_JSON_CSV.py) and cached in ticket_field_index.json:
+
+    fields:  field id -> {"title", "type"}
+    options: field id -> {option value -> display name}
+
+`expand_custom_fields` uses it to turn each ticket's raw list of
+{id, value} pairs into one column per field, titled by the field name and
+holding the option display name, using pandas lookups over all tickets at
+once instead of nested loops per ticket.
+
+The ticket exporters (fetch_tickets_advanced.py, tickets_missing_category.py)
+add the named fields to their output when ZENDESK_EXPAND_CUSTOM_FIELDS=1 is
+set in .env.
+
+Rebuild the cached index after changing ticket fields in Zendesk:
+    python field_decoder.py --refresh
+"""
+
+import argparse
+import json
+import os
+
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
+
+INDEX_FILE = "ticket_field_index.json"
+FIELDS_FILE = "ticket_fields.json"
+
+
+def expansion_enabled():
+    """True when ZENDESK_EXPAND_CUSTOM_FIELDS=1 asks the exporters for named custom fields."""
+    return os.getenv("ZENDESK_EXPAND_CUSTOM_FIELDS", "").strip().lower() in ("1", "true", "yes")
+
+
+def build_field_index(fields):
+    """Builds the id -> title/type and option value -> name lookups."""
+    index = {"fields": {}, "options": {}}
+    for field in fields:
+        field_id = str(field["id"])
+        index["fields"][field_id] = {"title": field.get("title"), "type": field.get("type")}
+        options = field.get("custom_field_options") or []
+        if options:
+            index["options"][field_id] = {option["value"]: option["name"] for option in options}
+    return index
+
+
+def load_field_index(refresh=False):
+    """
+    Returns the field index, rebuilding the cache only when needed.
+
+    The cache is reused until ticket_fields.json is newer than it. With
+    refresh=True (or no ticket_fields.json at all) the fields are fetched
+    from Zendesk and ticket_fields.json is rewritten first.
+    """
+    if not refresh and os.path.exists(INDEX_FILE) and (
+            not os.path.exists(FIELDS_FILE) or os.path.getmtime(INDEX_FILE) >= os.path.getmtime(FIELDS_FILE)):
+        with open(INDEX_FILE) as f:
+            return json.load(f)
+
+    if refresh or not os.path.exists(FIELDS_FILE):
+        from ticket_fields_JSON_CSV import fetch_ticket_fields, save_fields_to_json
+
+        fields = fetch_ticket_fields()
+        if fields is None:
+            raise RuntimeError("Could not fetch ticket fields from Zendesk")
+        save_fields_to_json(fields, FIELDS_FILE)
+    else:
+        with open(FIELDS_FILE) as f:
+            fields = json.load(f)
+
+    index = build_field_index(fields)
+    with open(INDEX_FILE, "w") as f:
+        json.dump(index, f)
+    print(f"Cached {len(index['fields'])} ticket fields to {INDEX_FILE}")
+    return index
+
+
+def column_titles(index):
+    """Maps field id -> column title, suffixing the id where titles collide."""
+    seen = {}
+    for field in index["fields"].values():
+        seen[field["title"]] = seen.get(field["title"], 0) + 1
+    return {
+        field_id: field["title"] if seen[field["title"]] == 1 else f"{field['title']} ({field_id})"
+        for field_id, field in index["fields"].items()
+    }
+
+
+def expand_custom_fields(tickets, index):
+    """
+    Expands custom fields into one named column per field.
+
+    Args:
+        tickets (list): Ticket dicts or ticket_records with a "custom_fields" list.
+        index (dict): Field index from load_field_index().
+
+    Returns:
+        pandas.DataFrame: One row per ticket (same order), one column per field
+        that has a value on at least one ticket. Option values are replaced by
+        their display names; multi-select values are joined with ", ".
+    """
+    import pandas as pd
+
+    rows, field_ids, values = [], [], []
+    for row, ticket in enumerate(tickets):
+        for item in ticket.get("custom_fields") or []:
+            rows.append(row)
+            field_ids.append(str(item.get("id")))
+            values.append(item.get("value"))
+
+    titles = column_titles(index)
+    long = pd.DataFrame({"row": rows, "field_id": field_ids, "value": values})
+    long = long.explode("value")
+    long = long[long["value"].notna()]
+    if long.empty:
+        return pd.DataFrame(index=range(len(tickets)))
+
+    # One lookup for every (field, option value) pair across all tickets
+    options = pd.Series({
+        (field_id, value): name
+        for field_id, field_options in index["options"].items()
+        for value, name in field_options.items()
+    }, dtype=object)
+    keys = pd.MultiIndex.from_arrays([long["field_id"], long["value"].astype(str)])
+    names = options.reindex(keys).to_numpy() if len(options) else [None] * len(long)
+    long["display"] = pd.Series(names, index=long.index).fillna(long["value"]).astype(str)
+
+    wide = (
+        long.groupby(["row", "field_id"], sort=False)["display"].agg(", ".join)
+        .unstack("field_id")
+        .reindex(range(len(tickets)))
+        .rename_axis(None)
+    )
+    ordered = [field_id for field_id in titles if field_id in wide.columns]
+    ordered += [field_id for field_id in wide.columns if field_id not in titles]
+    wide = wide[ordered]
+    wide.columns = [titles.get(field_id, field_id) for field_id in ordered]
+    return wide
+
+
+def named_custom_fields(tickets, index=None):
+    """
+    Returns one {field title: display value} dict per ticket, for JSON output.
+
+    Fields without a value on a ticket are left out of its dict.
+    """
+    wide = expand_custom_fields(tickets, index or load_field_index())
+    return [
+        {title: value for title, value in row.items() if isinstance(value, str)}
+        for row in wide.to_dict("records")
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the cached ticket field index.")
+    parser.add_argument("--refresh", action="store_true", help="Fetch ticket fields from Zendesk again")
+    args = parser.parse_args()
+
+    index = load_field_index(refresh=args.refresh)
+    print(f"{len(index['fields'])} fields, {len(index['options'])} with options")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# find_duplicate_orgs.py
+"""
+Finds likely duplicate organizations without comparing every org to every
+other org.
+
+Organizations are grouped into "blocks" that share something cheap to index:
+the same normalized name, the same domain name, the same SFDC Account ID or
+Billing Org ID, or a shared (uncommon) name token. Orgs that share an exact
+key are linked straight away; fuzzy name similarity only runs between orgs
+that share a name-token block. Linked orgs are merged into clusters and
+written out ranked by how confident the match is.
+
+Usage:
+    python find_duplicate_orgs.py                       # fetch orgs from Zendesk
+    python find_duplicate_orgs.py --from-csv zendesk_orgs.csv
+    python find_duplicate_orgs.py --processes 4 --threshold 0.9
+"""
+
+import argparse
+import csv
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from multiprocessing import Pool
+
+from fetch_orgs import get_organizations
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
+
+# Words that say nothing about which company an org is
+STOP_TOKENS = {
+    "inc", "incorporated", "llc", "llp", "ltd", "limited", "corp", "corporation",
+    "co", "company", "gmbh", "plc", "sa", "ag", "bv", "pty", "srl", "the", "and",
+    "of", "group", "holdings",
+}
+
+_names = None  # Normalized names, shared with pool workers
+
+
+def normalize_name(name):
+    """Lowercases a name and strips punctuation and legal suffixes."""
+    name = (name or "").lower().replace("&", " and ")
+    tokens = [t for t in re.split(r"[^a-z0-9]+", name) if t and t not in STOP_TOKENS]
+    return " ".join(tokens)
+
+
+def normalize_domain(domain):
+    domain = (domain or "").strip().lower()
+    domain = re.sub(r"^https?://", "", domain).split("/")[0]
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def load_orgs_from_csv(filename):
+    """
+    Loads organizations from a CSV written by fetch_orgs.write_orgs_to_csv,
+    reshaped to look like the API records.
+    """
+    organizations = []
+    with open(filename, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            organizations.append({
+                "id": row.get("ID"),
+                "name": row.get("Name"),
+                "domain_names": [d for d in (row.get("Domain Names") or "").split(", ") if d],
+                "organization_fields": {
+                    "sfdc_account_id": row.get("SFDC Account ID"),
+                    "billing_org_id": row.get("Billing Org ID"),
+                },
+            })
+    return organizations
+
+
+def build_blocks(organizations, names):
+    """
+    Builds the blocking indexes.
+
+    Returns:
+        tuple: (exact_blocks, token_blocks) where each maps a key to the list
+        of org positions that share it.
+    """
+    exact_blocks = defaultdict(list)
+    token_blocks = defaultdict(list)
+
+    for i, org in enumerate(organizations):
+        fields = org.get("organization_fields") or {}
+        if names[i]:
+            exact_blocks[("name", names[i])].append(i)
+            for token in set(names[i].split()):
+                if len(token) >= 3:
+                    token_blocks[token].append(i)
+        for domain in org.get("domain_names") or []:
+            domain = normalize_domain(domain)
+            if domain:
+                exact_blocks[("domain", domain)].append(i)
+        for key in ("sfdc_account_id", "billing_org_id"):
+            value = str(fields.get(key) or "").strip()
+            if value:
+                exact_blocks[(key, value)].append(i)
+
+    return exact_blocks, token_blocks
+
+
+def candidate_pairs(token_blocks, max_block_size):
+    """Yields each pair of orgs that share at least one usable name-token block."""
+    seen = set()
+    for members in token_blocks.values():
+        # Very common tokens ("global", "solutions") make blocks too big to be useful
+        if len(members) < 2 or len(members) > max_block_size:
+            continue
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                pair = (members[a], members[b])
+                if pair not in seen:
+                    seen.add(pair)
+                    yield pair
+
+
+def _init_worker(names):
+    global _names
+    _names = names
+
+
+def _score_pairs(args):
+    """Scores a chunk of candidate pairs, keeping only those above the threshold."""
+    pairs, threshold = args
+    matches = []
+    matcher = SequenceMatcher(autojunk=False)
+    current_j = None
+    # Sorting by the second org lets the matcher reuse its index of that name
+    for i, j in sorted(pairs, key=lambda pair: pair[1]):
+        a, b = _names[i], _names[j]
+        # Length alone bounds the ratio, so most pairs stop here
+        if 2.0 * min(len(a), len(b)) / (len(a) + len(b)) < threshold:
+            continue
+        if j != current_j:
+            matcher.set_seq2(b)
+            current_j = j
+        matcher.set_seq1(a)
+        if matcher.quick_ratio() < threshold:
+            continue
+        score = matcher.ratio()
+        if score >= threshold:
+            matches.append((i, j, score))
+    return matches
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def find_duplicate_clusters(organizations, threshold=0.88, processes=1,
+                            max_block_size=200, chunk_size=20000):
+    """
+    Groups organizations into ranked duplicate clusters.
+
+    Args:
+        organizations (list): Organization dicts as returned by the API.
+        threshold (float): Minimum name similarity (0-1) for a fuzzy match.
+        processes (int): Worker processes used for fuzzy scoring. 1 runs in-process.
+        max_block_size (int): Name-token blocks larger than this are skipped.
+        chunk_size (int): Candidate pairs handed to a worker at a time.
+
+    Returns:
+        list: Clusters sorted best-first. Each cluster is a dict with
+        'members' (org positions), 'score' and 'reasons'.
+    """
+    names = [normalize_name(org.get("name")) for org in organizations]
+    exact_blocks, token_blocks = build_blocks(organizations, names)
+
+    parent = list(range(len(organizations)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    edges = []  # (i, j, score, reason)
+
+    # Exact keys link every member of the block to its first member
+    for (kind, _), members in exact_blocks.items():
+        for other in members[1:]:
+            edges.append((members[0], other, 1.0, kind))
+
+    # Fuzzy name similarity, only within token blocks
+    work = ((chunk, threshold) for chunk in _chunks(candidate_pairs(token_blocks, max_block_size), chunk_size))
+    if processes and processes > 1:
+        with Pool(processes, initializer=_init_worker, initargs=(names,)) as pool:
+            for matches in pool.imap_unordered(_score_pairs, work):
+                edges.extend((i, j, score, "fuzzy_name") for i, j, score in matches)
+    else:
+        _init_worker(names)
+        for args in work:
+            edges.extend((i, j, score, "fuzzy_name") for i, j, score in _score_pairs(args))
+
+    for i, j, _, _ in edges:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[root_j] = root_i
+
+    clusters = {}
+    for i, j, score, reason in edges:
+        cluster = clusters.setdefault(find(i), {"members": set(), "score": 0.0, "reasons": set()})
+        cluster["members"].update((i, j))
+        cluster["score"] = max(cluster["score"], score)
+        cluster["reasons"].add(reason)
+
+    ranked = sorted(
+        clusters.values(),
+        key=lambda c: (c["score"], len(c["reasons"]), len(c["members"])),
+        reverse=True,
+    )
+    for cluster in ranked:
+        cluster["members"] = sorted(cluster["members"])
+    return ranked
+
+
+def write_clusters_to_csv(clusters, organizations, filename="duplicate_orgs.csv"):
+    """Writes one row per organization, grouped by cluster in ranked order."""
+    with open(filename, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            "Cluster", "Cluster Score", "Match Reasons", "ID", "Name",
+            "Domain Names", "SFDC Account ID", "Billing Org ID",
+        ])
+        for number, cluster in enumerate(clusters, start=1):
+            reasons = ", ".join(sorted(cluster["reasons"]))
+            for i in cluster["members"]:
+                org = organizations[i]
+                fields = org.get("organization_fields") or {}
+                writer.writerow([
+                    number,
+                    round(cluster["score"], 3),
+                    reasons,
+                    org.get("id"),
+                    org.get("name"),
+                    ", ".join(org.get("domain_names") or []),
+                    fields.get("sfdc_account_id"),
+                    fields.get("billing_org_id"),
+                ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find duplicate Zendesk organizations.")
+    parser.add_argument("--from-csv", help="Read orgs from a fetch_orgs.py CSV instead of the API")
+    parser.add_argument("--output", default="duplicate_orgs.csv")
+    parser.add_argument("--threshold", type=float, default=0.88, help="Fuzzy name similarity cut-off (0-1)")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes for fuzzy scoring")
+    parser.add_argument("--max-block-size", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.from_csv:
+        organizations = load_orgs_from_csv(args.from_csv)
+    else:
+        organizations = get_organizations(limit=None)
+
+    if not organizations:
+        print("No organizations returned.")
+        return
+
+    print(f"Checking {len(organizations)} organizations for duplicates...")
+    clusters = find_duplicate_clusters(
+        organizations,
+        threshold=args.threshold,
+        processes=args.processes,
+        max_block_size=args.max_block_size,
+    )
+    write_clusters_to_csv(clusters, organizations, args.output)
+    duplicates = sum(len(c["members"]) for c in clusters)
+    print(f"Found {len(clusters)} duplicate clusters covering {duplicates} organizations. "
+          f"Check '{args.output}' for your results.")
+
+
+if __name__ == "__main__":
+    main()
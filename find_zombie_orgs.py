@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# find_zombie_orgs.py
+"""
+Finds "zombie" organizations: orgs with no ticket activity in the last N days.
+
+Instead of asking Zendesk about each organization, the script streams the
+incremental ticket export once and keeps a running tally per
+organization_id (last activity, ticket count, open tickets). It does the
+same for users to count members, then joins both against the organization
+export. The cost is one pass over tickets, users and orgs no matter how
+many organizations there are.
+
+Usage:
+    python find_zombie_orgs.py                 # no activity in 365 days
+    python find_zombie_orgs.py --days 180
+    python find_zombie_orgs.py --skip-users    # don't count members
+"""
+
+import argparse
+import csv
+from datetime import datetime, timedelta, timezone
+
+import profiling
+from zendesk_client import paginate
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
+
+OPEN_STATUSES = {"new", "open", "pending", "hold"}
+
+
+def aggregate_ticket_activity(tickets):
+    """
+    Tallies ticket activity per organization in a single pass.
+
+    The incremental export returns a snapshot of a ticket each time it
+    changed, so only the last snapshot per ticket is counted: a ticket is
+    tallied once, under the organization and status it has now.
+
+    Args:
+        tickets (iterable): Ticket dicts, e.g. from the incremental export.
+
+    Returns:
+        dict: organization_id -> [last_activity, ticket_count, open_count].
+        last_activity is the latest ISO 8601 updated_at string.
+    """
+    # Keep only what the tally needs from each ticket's latest snapshot
+    latest = {}
+    for ticket in tickets:
+        latest[ticket["id"]] = (
+            ticket.get("organization_id"),
+            ticket.get("status"),
+            ticket.get("updated_at") or ticket.get("created_at") or "",
+        )
+
+    activity = {}
+    for org_id, status, updated_at in latest.values():
+        if org_id is None or status == "deleted":
+            continue
+        stats = activity.get(org_id)
+        if stats is None:
+            stats = activity[org_id] = ["", 0, 0]
+        # Zendesk timestamps are all UTC "Z" strings, so they sort as text
+        if updated_at > stats[0]:
+            stats[0] = updated_at
+        stats[1] += 1
+        if status in OPEN_STATUSES:
+            stats[2] += 1
+    return activity
+
+
+def count_org_members(users):
+    """Counts users per organization_id, using the latest snapshot of each user."""
+    latest = {}
+    for user in users:
+        latest[user["id"]] = user.get("organization_id") if user.get("active", True) else None
+
+    members = {}
+    for org_id in latest.values():
+        if org_id is not None:
+            members[org_id] = members.get(org_id, 0) + 1
+    return members
+
+
+def find_zombie_orgs(organizations, activity, members, days=365, now=None):
+    """
+    Joins organizations with their ticket activity and keeps the inactive ones.
+
+    An organization is a zombie when it was created more than `days` ago and
+    has had no ticket updated since then (or never had a ticket at all).
+
+    Returns:
+        list: Row dicts sorted with the longest-inactive organizations first.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    # The incremental export can return an org more than once; the last snapshot is current
+    latest = {}
+    for org in organizations:
+        latest[org.get("id")] = org
+
+    zombies = []
+    for org in latest.values():
+        if org.get("deleted_at"):
+            continue
+        created_at = org.get("created_at") or ""
+        last_activity, ticket_count, open_count = activity.get(org.get("id"), ("", 0, 0))
+        if created_at > cutoff or last_activity > cutoff:
+            continue
+
+        since = last_activity or created_at
+        days_inactive = ""
+        if since:
+            days_inactive = (now - datetime.strptime(since, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)).days
+
+        zombies.append({
+            "ID": org.get("id"),
+            "Name": org.get("name"),
+            "Created At": created_at,
+            "Last Ticket Activity": last_activity,
+            "Days Inactive": days_inactive,
+            "Ticket Count": ticket_count,
+            "Open Tickets": open_count,
+            "Member Count": members.get(org.get("id"), 0),
+        })
+
+    zombies.sort(key=lambda row: row["Days Inactive"] or 0, reverse=True)
+    return zombies
+
+
+def write_zombies_to_csv(zombies, filename="zombie_orgs.csv"):
+    headers = [
+        "ID", "Name", "Created At", "Last Ticket Activity", "Days Inactive",
+        "Ticket Count", "Open Tickets", "Member Count",
+    ]
+    with open(filename, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        writer.writeheader()
+        writer.writerows(zombies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find Zendesk organizations with no recent ticket activity.")
+    parser.add_argument("--days", type=int, default=365, help="Inactivity window in days")
+    parser.add_argument("--skip-users", action="store_true", help="Don't stream users to count members")
+    parser.add_argument("--output", default="zombie_orgs.csv")
+    args = parser.parse_args()
+
+    print("Streaming tickets...")
+    activity = aggregate_ticket_activity(
+        paginate("/incremental/tickets/cursor.json", "tickets", {"start_time": 0})
+    )
+    print(f"Found ticket activity for {len(activity)} organizations.")
+
+    members = {}
+    if not args.skip_users:
+        print("Streaming users...")
+        members = count_org_members(
+            paginate("/incremental/users/cursor.json", "users", {"start_time": 0})
+        )
+
+    print("Streaming organizations...")
+    organizations = paginate("/incremental/organizations.json", "organizations", {"start_time": 0})
+    zombies = find_zombie_orgs(organizations, activity, members, days=args.days)
+
+    write_zombies_to_csv(zombies, args.output)
+    print(f"Found {len(zombies)} organizations with no activity in {args.days} days. "
+          f"Check '{args.output}' for your results.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Optional HTTP/2 transport for zendesk_client.
+
+With ZENDESK_HTTP2=1 in .env and httpx installed with HTTP/2 support
+(pip install "httpx[http2]"), every ZendeskInstance sends its requests
+through an httpx client with http2=True instead of a requests session.
+Concurrent requests from all threads are then multiplexed as streams over
+a few connections to {subdomain}.zendesk.com, instead of one TLS
+connection (and handshake) per request in flight.
+
+Responses are converted to requests.Response objects and transport errors
+to requests exceptions, so raise_for_status, the 429 retry loop,
+json_codec and every caller work unchanged. Without httpx/h2, or while a
+cassette is recording or replaying (cassettes hook requests), the pooled
+HTTP/1.1 session is used. See bench_http2.py for a local comparison.
+"""
+
+import os
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import cassette
+import profiling
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+AVAILABLE = httpx is not None and h2 is not None
+TIMEOUT = 120  # Seconds; large incremental export pages can be slow to generate
+
+_warned = False
+
+
+def enabled():
+    """True when ZENDESK_HTTP2=1 and the HTTP/2 transport can be used."""
+    global _warned
+    if os.getenv("ZENDESK_HTTP2", "").strip().lower() not in ("1", "true", "yes"):
+        return False
+    if not AVAILABLE:
+        if not _warned:
+            print('ZENDESK_HTTP2 is set but httpx[http2] is not installed; using HTTP/1.1.')
+            _warned = True
+        return False
+    return not cassette.installed()
+
+
+def _to_requests_response(response):
+    result = requests.Response()
+    result.status_code = response.status_code
+    result.headers = CaseInsensitiveDict(response.headers)
+    result.headers.pop("Content-Encoding", None)  # httpx has already decoded the body
+    result._content = response.content
+    result.encoding = response.encoding
+    result.url = str(response.url)
+    result.reason = response.reason_phrase
+    result.elapsed = response.elapsed
+    result.http_version = response.http_version
+    return result
+
+
+class Http2Session:
+    """
+    The parts of requests.Session that the scripts use, over an httpx HTTP/2 client.
+
+    Example:
+        session = Http2Session(HTTPBasicAuth(f"{email}/token", token), max_connections=10)
+        response = session.get(f"{base_url}/tickets/1.json")
+    """
+
+    def __init__(self, auth=None, headers=None, max_connections=10, http1=True, verify=True):
+        self.auth = auth
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.client = httpx.Client(
+            http1=http1,
+            http2=True,
+            verify=verify,
+            timeout=TIMEOUT,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def request(self, method, url, params=None, data=None, json=None, headers=None, timeout=None, **kwargs):
+        if isinstance(params, dict):
+            params = {key: value for key, value in params.items() if value is not None}
+        content = None
+        if isinstance(data, (bytes, str)):
+            content, data = data, None
+        auth = (self.auth.username, self.auth.password) if self.auth is not None else None
+        try:
+            with profiling.phase("network"):
+                response = self.client.request(
+                    method, url, params=params, data=data or None, content=content, json=json,
+                    headers={**self.headers, **(headers or {})}, auth=auth,
+                    timeout=timeout if timeout is not None else TIMEOUT,
+                )
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        return _to_requests_response(response)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        self.client.close()
@@ -1,41 +1,120 @@
-import requests
-import os
-import base64
-from dotenv import load_dotenv
+"""
+Builds a problem -> incidents index for the whole Zendesk instance.
+
+Rather than calling /tickets/{id}/incidents once per problem ticket, the
+script streams every incident ticket through the search export API (up to
+1,000 per request) and groups them by `problem_id`. The index is saved to
+incidents_index.json so later questions are answered locally:
 
-# Load environment variables from .env file
-load_dotenv()
+    python incidents_problems.py --rebuild          # refresh the index
+    python incidents_problems.py 83071 84364        # incidents per problem
+    python incidents_problems.py --top 20           # busiest problems
+    python incidents_problems.py --orphans          # incidents with no problem
+"""
+import argparse
+import json
+import os
+from datetime import datetime
 
-# Debug prints
-email_address = os.getenv('ZENDESK_EMAIL')
-api_token = os.getenv('ZENDESK_API_TOKEN')
-subdomain = os.getenv('ZENDESK_SUBDOMAIN')
+import profiling
+from zendesk_client import paginate
 
-print(f"Email: {email_address}")
-print(f"API Token: {api_token}")
-print(f"Subdomain: {subdomain}")
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
-# Encode email and API token for Basic Authentication
-auth_string = f"{email_address}/token:{api_token}"
-auth_encoded = base64.b64encode(auth_string.encode()).decode()
+INDEX_FILE = "incidents_index.json"
 
-# List of ticket IDs
+# Problem ticket IDs reported on when none are given on the command line
 ticket_ids = [
     83071, 84364, 84926, 84957, 85006, 85012, 85013, 85017, 85019, 85021, 85029
 ]
 
-headers = {
-    "Authorization": f"Basic {auth_encoded}",
-    "Content-Type": "application/json",
-}
-
-for ticket_id in ticket_ids:
-    url = f"https://{subdomain}.zendesk.com/api/v2/tickets/{ticket_id}/incidents"
-    response = requests.get(url, headers=headers)
-    
-    if response.status_code == 200:
-        print(f"Incidents for ticket {ticket_id}:")
-        print(response.json())
+
+def _search_export(query):
+    params = {"query": query, "filter[type]": "ticket", "page[size]": 1000}
+    return paginate("/search/export.json", "results", params)
+
+
+def build_incident_index():
+    """
+    Streams all problem and incident tickets once and groups incidents by problem.
+
+    Returns:
+        dict: {"problems": {problem_id: [incident_id, ...]},
+               "orphans": [incident_id, ...], "built_at": ISO timestamp}
+        Problems with no incidents are kept with an empty list.
+    """
+    problems = {str(ticket["id"]): [] for ticket in _search_export("type:problem")}
+    orphans = []
+
+    for ticket in _search_export("type:incident"):
+        problem_id = ticket.get("problem_id")
+        if problem_id is None:
+            orphans.append(ticket["id"])
+        else:
+            problems.setdefault(str(problem_id), []).append(ticket["id"])
+
+    return {
+        "problems": problems,
+        "orphans": sorted(orphans),
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def save_index(index, file_name=INDEX_FILE):
+    with open(file_name, "w") as f:
+        json.dump(index, f)
+    linked = sum(len(incidents) for incidents in index["problems"].values())
+    print(f"Indexed {len(index['problems'])} problems, {linked} linked incidents and "
+          f"{len(index['orphans'])} orphaned incidents into {file_name}")
+
+
+def load_index(file_name=INDEX_FILE):
+    with open(file_name) as f:
+        return json.load(f)
+
+
+def incident_counts(index, problem_ids):
+    """Returns {problem_id: incident count} for the given problem IDs."""
+    return {problem_id: len(index["problems"].get(str(problem_id), [])) for problem_id in problem_ids}
+
+
+def orphaned_incidents(index):
+    """Returns incident IDs that aren't linked to any problem."""
+    return index["orphans"]
+
+
+def top_problems(index, n=10):
+    """Returns the n problems with the most incidents as (problem_id, count) pairs."""
+    counts = ((problem_id, len(incidents)) for problem_id, incidents in index["problems"].items())
+    return sorted(counts, key=lambda item: item[1], reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the Zendesk problem/incident graph.")
+    parser.add_argument("problem_ids", nargs="*", type=int, help="Problem ticket IDs to report on")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from Zendesk")
+    parser.add_argument("--top", type=int, help="Show the N problems with the most incidents")
+    parser.add_argument("--orphans", action="store_true", help="List incidents with no linked problem")
+    args = parser.parse_args()
+
+    if args.rebuild or not os.path.exists(INDEX_FILE):
+        save_index(build_incident_index())
+    index = load_index()
+
+    if args.top:
+        print(f"Top {args.top} problems by incident count:")
+        for problem_id, count in top_problems(index, args.top):
+            print(f"  {problem_id}: {count}")
+    elif args.orphans:
+        orphans = orphaned_incidents(index)
+        print(f"{len(orphans)} incidents are not linked to a problem:")
+        print(orphans)
     else:
-        print(f"Error fetching incidents for ticket {ticket_id}: {response.status_code}")
-        print(response.text)
+        for problem_id, count in incident_counts(index, args.problem_ids or ticket_ids).items():
+            print(f"Incidents for ticket {problem_id}: {count}")
+            print(index["problems"].get(str(problem_id), []))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# journal.py
+"""
+Append-only journal for destructive bulk operations.
+
+Each line records that an operation (e.g. "delete_ticket") finished for one
+entity ID. Lines are flushed and fsync'd once per batch, so a run that dies
+halfway still leaves an exact record of what was completed. Scripts check
+the journal on start-up and skip anything already done. Each Zendesk
+instance has its own journal file, named after the subdomain in .env.
+
+Ask what was done without touching the API:
+    python journal.py                     # counts per operation and status
+    python journal.py delete_ticket       # IDs completed for one operation
+"""
+
+import json
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv(".env")
+
+
+def default_path(subdomain=None):
+    """
+    The journal file for one Zendesk instance, bulk_operations.<subdomain>.journal,
+    so IDs completed on one subdomain are never skipped on another.
+    ZENDESK_JOURNAL overrides it.
+    """
+    if os.getenv("ZENDESK_JOURNAL"):
+        return os.getenv("ZENDESK_JOURNAL")
+    subdomain = subdomain or os.getenv("ZENDESK_SUBDOMAIN")
+    return f"bulk_operations.{subdomain}.journal" if subdomain else "bulk_operations.journal"
+
+
+class Journal:
+    """
+    Example:
+        journal = Journal()
+        todo = journal.pending("delete_ticket", ticket_ids)
+        ...
+        journal.record("delete_ticket", [ticket_id])
+    """
+
+    def __init__(self, path=None, subdomain=None):
+        self.path = path or default_path(subdomain)
+        self._done = defaultdict(set)
+        self._entries = []
+        self._torn_tail = False
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash; everything before it is intact
+                        continue
+                    self._entries.append(entry)
+                    if entry.get("status") == "done":
+                        self._done[entry["op"]].add(entry["id"])
+                self._torn_tail = f.tell() > 0 and not line.endswith("\n")
+
+    def is_done(self, op, entity_id):
+        return str(entity_id) in self._done[op]
+
+    def pending(self, op, entity_ids):
+        """Returns the IDs not yet completed for `op`, keeping their order."""
+        done = self._done[op]
+        return [entity_id for entity_id in entity_ids if str(entity_id) not in done]
+
+    def record(self, op, entity_ids, status="done", detail=None):
+        """Appends one line per ID and fsyncs the batch to disk."""
+        timestamp = datetime.now().isoformat(timespec="seconds")
+        lines = []
+        for entity_id in entity_ids:
+            entry = {"op": op, "id": str(entity_id), "status": status, "at": timestamp}
+            if detail:
+                entry["detail"] = detail
+            lines.append(json.dumps(entry) + "\n")
+            self._entries.append(entry)
+            if status == "done":
+                self._done[op].add(str(entity_id))
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            if self._torn_tail:
+                f.write("\n")
+                self._torn_tail = False
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def completed(self, op):
+        return set(self._done[op])
+
+    def summary(self):
+        """Returns {op: {status: count}} using the latest status for each ID."""
+        latest = {}
+        for entry in self._entries:
+            latest[(entry["op"], entry["id"])] = entry["status"]
+        counts = defaultdict(lambda: defaultdict(int))
+        for (op, _), status in latest.items():
+            counts[op][status] += 1
+        return counts
+
+
+def main():
+    journal = Journal()
+    if len(sys.argv) > 1:
+        done = sorted(journal.completed(sys.argv[1]), key=lambda i: (len(i), i))
+        print(f"{len(done)} completed for '{sys.argv[1]}':")
+        print(", ".join(done))
+        return
+
+    summary = journal.summary()
+    if not summary:
+        print(f"No operations recorded in {journal.path}")
+    for op, statuses in sorted(summary.items()):
+        counts = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+        print(f"{op}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
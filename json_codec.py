@@ -0,0 +1,118 @@
+"""
+JSON encoding and decoding for the export scripts.
+
+Uses orjson or msgspec when one is installed and falls back to the standard
+library json module otherwise, so nothing extra is required to run the
+scripts. On 1,000-record export pages the faster libraries cut decode and
+encode time several-fold (see bench_json_codec.py).
+
+`decode_records` goes one step further: given the fields a script actually
+uses, msgspec decodes the page straight into typed structs and never
+builds Python objects for anything else (descriptions, via, metadata...).
+Without msgspec the page is decoded normally and projected to those fields.
+"""
+
+import json
+from typing import List
+
+import profiling
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+else:
+    BACKEND = "json"
+
+# Page-level keys used by the different pagination styles
+PAGE_KEYS = ("next_page", "after_url", "end_of_stream", "links", "meta", "count")
+
+_page_decoders = {}
+
+
+def loads(data):
+    """Decodes JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent=False):
+    """
+    Encodes obj to a JSON string.
+
+    Every backend writes the same layout: compact (no spaces after , and :),
+    or with indent=True two-space indentation, and non-ASCII text as UTF-8
+    rather than \\u escapes. Files written with dump() must therefore be
+    opened with encoding="utf-8". Remaining differences are in edge cases:
+    float formatting, and NaN/Infinity, which orjson writes as null.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option).decode("utf-8")
+    if msgspec is not None and not indent:
+        return msgspec.json.encode(obj).decode("utf-8")
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def dump(obj, file, indent=False):
+    """Writes obj as JSON to a text file opened with encoding="utf-8"."""
+    file.write(dumps(obj, indent=indent))
+
+
+def decode_response(response):
+    """Drop-in replacement for response.json()."""
+    with profiling.phase("decode"):
+        return loads(response.content)
+
+
+def _page_decoder(key, fields):
+    cache_key = (key, fields)
+    decoder = _page_decoders.get(cache_key)
+    if decoder is None:
+        record = msgspec.defstruct(f"{key.title()}Record", [(name, object, None) for name in fields])
+        page = msgspec.defstruct(
+            f"{key.title()}Page",
+            [(key, List[record], [])] + [(name, object, None) for name in PAGE_KEYS],
+        )
+        decoder = _page_decoders[cache_key] = msgspec.json.Decoder(page)
+    return decoder
+
+
+def decode_records(data, key, fields):
+    """
+    Decodes a page, keeping only `fields` on each record under `key`.
+
+    Args:
+        data (bytes): Raw response body, e.g. response.content.
+        key (str): Name of the record list, e.g. "tickets".
+        fields (tuple): Record fields to keep.
+
+    Returns:
+        dict: The page's pagination keys plus `key` -> list of record dicts.
+    """
+    fields = tuple(fields)
+    if msgspec is not None:
+        return msgspec.to_builtins(_page_decoder(key, fields).decode(data))
+
+    page = loads(data)
+    records = [{name: record.get(name) for name in fields} for record in page.get(key, [])]
+    result = {name: page.get(name) for name in PAGE_KEYS}
+    result[key] = records
+    return result
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# multi_instance_export.py
+"""
+Runs exports for several Zendesk instances at the same time.
+
+Instances are listed in instances.json (keep it out of version control, like .env):
+
+    [
+        {"name": "us", "subdomain": "acme", "email": "admin@acme.com", "api_token_env": "ZENDESK_API_TOKEN_US"},
+        {"name": "eu", "subdomain": "acme-eu", "email": "admin@acme.com", "api_token": "...", "rate_limit": 400}
+    ]
+
+`api_token_env` names an environment variable (or .env entry) holding the
+token, so tokens don't have to live in the file. `rate_limit` is the
+instance's requests per minute (defaults to 700).
+
+Every (instance, export) pair runs in its own thread. Each instance has its
+own connection pool and rate limiter, so a slow or throttled instance never
+holds up the others and the whole run takes about as long as the slowest
+instance. Output goes to exports/<name>/<export>.jsonl (compressed and
+sharded when ZENDESK_OUTPUT_COMPRESSION / ZENDESK_SHARD_* are set).
+
+Usage:
+    python multi_instance_export.py                          # every export, every instance
+    python multi_instance_export.py --exports orgs triggers
+    python multi_instance_export.py --instances us --exports tickets
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+import output_writer
+import profiling
+from rate_limiter import DEFAULT_RATE_LIMIT
+from zendesk_client import ZendeskInstance
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
+
+# Load environment variables from .env file
+load_dotenv(".env")
+
+INSTANCES_FILE = "instances.json"
+OUTPUT_DIR = "exports"
+
+# export name -> (endpoint, response key, params)
+EXPORTS = {
+    "orgs": ("/organizations", "organizations", {"page[size]": 100}),
+    "users": ("/incremental/users/cursor.json", "users", {"start_time": 0}),
+    "triggers": ("/triggers", "triggers", {"page[size]": 100}),
+    "automations": ("/automations", "automations", {"page[size]": 100}),
+    "tickets": ("/incremental/tickets/cursor.json", "tickets", {"start_time": 0}),
+}
+
+
+def load_instances(file_name=INSTANCES_FILE):
+    """Reads the instance profiles and resolves their API tokens."""
+    with open(file_name) as f:
+        profiles = json.load(f)
+
+    for profile in profiles:
+        profile.setdefault("name", profile["subdomain"])
+        if not profile.get("api_token"):
+            token_env = profile.get("api_token_env")
+            profile["api_token"] = os.getenv(token_env) if token_env else None
+        if not profile["api_token"]:
+            raise ValueError(f"No API token for instance '{profile['name']}'")
+    return profiles
+
+
+def run_export(instance, name, export, output_dir=OUTPUT_DIR):
+    """
+    Streams one export from one instance to exports/<name>/<export>.jsonl.
+
+    Returns:
+        dict: instance, export, rows and elapsed seconds (plus "error" on failure).
+    """
+    endpoint, key, params = EXPORTS[export]
+    path = os.path.join(output_dir, name, f"{export}.jsonl")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    started = time.time()
+    rows = 0
+    result = {"instance": name, "export": export}
+    try:
+        with output_writer.open_export(path) as writer:
+            for record in instance.paginate(endpoint, key, dict(params)):
+                writer.write(record)
+                rows += 1
+                if rows % 10000 == 0:
+                    print(f"[{name}] {export}: {rows} rows...")
+    except Exception as e:
+        result["error"] = str(e)
+        print(f"[{name}] {export} failed after {rows} rows: {e}")
+    result.update(rows=rows, seconds=time.time() - started)
+    return result
+
+
+def export_all(profiles, exports, output_dir=OUTPUT_DIR, max_workers=None):
+    """Runs every export for every instance concurrently and returns the results."""
+    instances = {
+        profile["name"]: ZendeskInstance(
+            profile["subdomain"],
+            profile["email"],
+            profile["api_token"],
+            rate_limit=int(profile.get("rate_limit", DEFAULT_RATE_LIMIT)),
+        )
+        for profile in profiles
+    }
+    jobs = [(name, export) for name in instances for export in exports]
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs)) as executor:
+        futures = [
+            executor.submit(run_export, instances[name], name, export, output_dir)
+            for name, export in jobs
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            if "error" not in result:
+                print(f"[{result['instance']}] {result['export']}: "
+                      f"{result['rows']} rows in {result['seconds']:.1f}s")
+            results.append(result)
+    return results
+
+
+def print_summary(results, elapsed):
+    print("\nInstance        Export          Rows      Seconds")
+    for result in sorted(results, key=lambda r: (r["instance"], r["export"])):
+        status = "  FAILED" if "error" in result else ""
+        print(f"{result['instance']:<15} {result['export']:<15} {result['rows']:>9} "
+              f"{result['seconds']:>8.1f}{status}")
+    serial = sum(result["seconds"] for result in results)
+    print(f"\nFinished in {elapsed:.1f}s ({serial:.1f}s if run one after another)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export data from several Zendesk instances at once.")
+    parser.add_argument("--config", default=INSTANCES_FILE, help="Instance profiles (JSON)")
+    parser.add_argument("--exports", nargs="+", choices=sorted(EXPORTS), default=sorted(EXPORTS))
+    parser.add_argument("--instances", nargs="+", help="Only these instance names")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, help="Maximum concurrent exports (default: all)")
+    args = parser.parse_args()
+
+    profiles = load_instances(args.config)
+    if args.instances:
+        profiles = [profile for profile in profiles if profile["name"] in args.instances]
+    if not profiles:
+        parser.error("No matching instances in the config")
+
+    started = time.time()
+    results = export_all(profiles, args.exports, args.output_dir, args.workers)
+    print_summary(results, time.time() - started)
+
+
+if __name__ == "__main__":
+    main()
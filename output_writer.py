@@ -0,0 +1,193 @@
+"""
+Streaming, compressed, sharded output for the exporters.
+
+ShardedWriter writes CSV or JSON Lines rows straight through gzip or zstd
+compression as they are produced, starts a new shard once the current one
+reaches a row or size limit, and finishes with a manifest listing every
+shard with its row count, size and SHA-256 so loaders can ingest the shards
+in parallel and verify them. If the export fails part-way, the manifest is
+still written for the shards on disk but says "complete": false.
+
+Exporters pick the settings up from the environment (.env):
+    ZENDESK_OUTPUT_COMPRESSION=gzip      # or zstd (needs `pip install zstandard`)
+    ZENDESK_SHARD_ROWS=1000000           # rotate after this many rows
+    ZENDESK_SHARD_MB=512                 # or after this many compressed MB
+
+When none of these are set the exporters keep writing their usual single file.
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+
+import cassette
+import json_codec
+import profiling
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+# Every exporter writing through this module accepts --profile and ZENDESK_CASSETTE
+profiling.install_from_argv()
+cassette.install_from_env()
+
+
+class _HashingFile(io.RawIOBase):
+    """Counts and hashes the bytes that actually land on disk."""
+
+    def __init__(self, path):
+        super().__init__()
+        self._file = open(path, "wb")
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return self._file.write(data)
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+class ShardedWriter:
+    """
+    Example:
+        with ShardedWriter("tickets.csv", fieldnames=headers, compression="gzip", max_rows=500000) as writer:
+            for ticket in tickets:
+                writer.write(ticket)
+        # tickets.part-00001.csv.gz, tickets.part-00002.csv.gz, ... and tickets.csv.manifest.json
+    """
+
+    def __init__(self, path, fieldnames=None, compression=None, max_rows=None, max_bytes=None):
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Unsupported compression '{compression}'. Use gzip or zstd.")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd output needs the zstandard package: pip install zstandard")
+
+        self.path = path
+        self.stem, self.extension = os.path.splitext(path)
+        self.format = "csv" if self.extension == ".csv" else "jsonl"
+        self.fieldnames = fieldnames
+        self.compression = compression
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.sharded = bool(max_rows or max_bytes)
+        self.shards = []
+        self._raw = None
+
+    def _open_shard(self):
+        number = len(self.shards) + 1
+        name = f"{self.stem}.part-{number:05d}{self.extension}" if self.sharded else self.path
+        name += EXTENSIONS[self.compression]
+
+        self._raw = _HashingFile(name)
+        if self.compression == "gzip":
+            self._compressed = gzip.GzipFile(filename="", mode="wb", fileobj=self._raw)
+        elif self.compression == "zstd":
+            self._compressed = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._compressed = None
+        stream = self._compressed or io.BufferedWriter(self._raw)
+        self._text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+
+        self.shards.append({"path": os.path.basename(name), "rows": 0})
+        if self.format == "csv":
+            self._csv = csv.DictWriter(self._text, fieldnames=self.fieldnames, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def _close_shard(self):
+        self._text.flush()
+        stream = self._text.detach()
+        if self._compressed is None:
+            stream.flush()
+        else:
+            self._compressed.close()
+        self._raw.close()
+        self.shards[-1]["bytes"] = self._raw.bytes
+        self.shards[-1]["sha256"] = self._raw.sha256.hexdigest()
+        self._raw = None
+
+    def write(self, row):
+        with profiling.phase("write"):
+            self._write(row)
+
+    def writerows(self, rows):
+        with profiling.phase("write"):
+            for row in rows:
+                self._write(row)
+
+    def _write(self, row):
+        if self._raw is None:
+            self._open_shard()
+        if self.format == "csv":
+            self._csv.writerow(row)
+        else:
+            self._text.write(json_codec.dumps(row))
+            self._text.write("\n")
+
+        shard = self.shards[-1]
+        shard["rows"] += 1
+        if (self.max_rows and shard["rows"] >= self.max_rows) or \
+                (self.max_bytes and self._raw.bytes >= self.max_bytes):
+            self._close_shard()
+
+    def close(self, complete=True):
+        """
+        Closes the last shard and writes the manifest next to the output.
+
+        Pass complete=False when the export was interrupted: the manifest then
+        says so, and loaders must not treat the shards as the full export.
+        """
+        if self._raw is not None:
+            with profiling.phase("write"):
+                self._close_shard()
+        manifest = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "complete": complete,
+            "format": self.format,
+            "compression": self.compression,
+            "total_rows": sum(shard["rows"] for shard in self.shards),
+            "shards": self.shards,
+        }
+        with open(f"{self.path}.manifest.json", "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # An exception means the shards hold only part of the export
+        self.close(complete=exc_info[0] is None)
+
+
+def streaming_enabled():
+    """True when compression or shard rotation is configured in the environment."""
+    return any(os.getenv(name) for name in ("ZENDESK_OUTPUT_COMPRESSION", "ZENDESK_SHARD_ROWS", "ZENDESK_SHARD_MB"))
+
+
+def open_export(path, fieldnames=None):
+    """Returns a ShardedWriter configured from the environment."""
+    shard_mb = os.getenv("ZENDESK_SHARD_MB")
+    shard_rows = os.getenv("ZENDESK_SHARD_ROWS")
+    return ShardedWriter(
+        path,
+        fieldnames=fieldnames,
+        compression=os.getenv("ZENDESK_OUTPUT_COMPRESSION") or None,
+        max_rows=int(shard_rows) if shard_rows else None,
+        max_bytes=int(float(shard_mb) * 1024 * 1024) if shard_mb else None,
+    )
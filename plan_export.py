@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# plan_export.py
+"""
+Plans a large export before it is launched.
+
+The ticket, user and organization counts are fetched at the same time and
+combined with the account's rate limit (read from the X-Rate-Limit headers
+of those same responses) and the measured API latency. For each object
+type the planner estimates three strategies and picks the fastest:
+
+    cursor        one cursor-paginated list, 100 records per request;
+                  bound by latency (one request in flight at a time)
+    partitioned   the search export split into created_at windows that are
+                  paged in parallel, 1,000 records per request; bound by the
+                  per-minute rate limit
+    incremental   the incremental export, 1,000 records per request but only
+                  10 requests per minute (30 with the High Volume add-on)
+
+It prints the request count and ETA for each, so exports that cannot finish
+inside the window are caught before they start.
+
+Usage:
+    python plan_export.py
+    python plan_export.py --window 2 --resources tickets users
+    python plan_export.py --incremental-rate 30        # High Volume API add-on
+    python plan_export.py --page-latency 1.5           # seconds per page seen in real exports
+
+The latency is measured on the count requests, which are lighter than a
+page of 1,000 records; pass --page-latency from a profiled export
+(python profiling.py ...) for tighter estimates.
+"""
+
+import argparse
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import profiling
+from rate_limiter import DEFAULT_RATE_LIMIT, HEADROOM
+from zendesk_client import request
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
+
+COUNT_ENDPOINTS = {
+    "tickets": "/tickets/count.json",
+    "users": "/users/count.json",
+    "organizations": "/organizations/count.json",
+}
+
+CURSOR_PAGE_SIZE = 100
+EXPORT_PAGE_SIZE = 1000
+INCREMENTAL_RATE = 10  # Incremental export requests per minute
+MAX_PARTITIONS = 16
+
+
+def fetch_count(resource):
+    """Returns (count, response) for one object type."""
+    response = request("GET", COUNT_ENDPOINTS[resource])
+    return response.json().get("count", {}).get("value", 0), response
+
+
+def fetch_counts(resources):
+    """Fetches every count concurrently and reads the rate-limit headers."""
+    with ThreadPoolExecutor(max_workers=len(resources)) as executor:
+        results = dict(zip(resources, executor.map(fetch_count, resources)))
+
+    counts = {resource: count for resource, (count, _) in results.items()}
+    responses = [response for _, response in results.values()]
+    latency = sum(response.elapsed.total_seconds() for response in responses) / len(responses)
+
+    configured = int(os.getenv("ZENDESK_RATE_LIMIT", DEFAULT_RATE_LIMIT))
+    limits = [int(r.headers["X-Rate-Limit"]) for r in responses if r.headers.get("X-Rate-Limit")]
+    remaining = [int(r.headers["X-Rate-Limit-Remaining"]) for r in responses
+                 if r.headers.get("X-Rate-Limit-Remaining")]
+    return {
+        "counts": counts,
+        "latency": latency,
+        "rate_limit": min(limits) if limits else configured,
+        "remaining": min(remaining) if remaining else None,
+    }
+
+
+def plan_resource(count, per_minute, latency, incremental_rate=INCREMENTAL_RATE):
+    """
+    Estimates every strategy for one object type.
+
+    Args:
+        count (int): Number of records.
+        per_minute (float): Requests per minute this export may use.
+        latency (float): Seconds per request.
+        incremental_rate (int): Incremental export requests allowed per minute.
+
+    Returns:
+        list: {"strategy", "requests", "seconds", "partitions"} dicts, fastest first.
+    """
+    per_second = per_minute / 60.0
+
+    cursor_requests = max(1, math.ceil(count / CURSOR_PAGE_SIZE))
+    cursor_seconds = cursor_requests * max(latency, 1 / per_second)
+
+    export_requests = max(1, math.ceil(count / EXPORT_PAGE_SIZE))
+    # Enough parallel windows to keep the rate limit busy despite latency
+    partitions = max(1, min(MAX_PARTITIONS, export_requests, math.ceil(per_second * latency)))
+    partitioned_seconds = max(export_requests / per_second, export_requests * latency / partitions)
+
+    incremental_seconds = max(export_requests * 60.0 / incremental_rate, export_requests * latency)
+
+    plans = [
+        {"strategy": "cursor", "requests": cursor_requests, "seconds": cursor_seconds, "partitions": 1},
+        {"strategy": "partitioned", "requests": export_requests, "seconds": partitioned_seconds,
+         "partitions": partitions},
+        {"strategy": "incremental", "requests": export_requests, "seconds": incremental_seconds,
+         "partitions": 1},
+    ]
+    return sorted(plans, key=lambda plan: (plan["seconds"], plan["requests"]))
+
+
+def format_duration(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def print_plan(info, plans, window_hours=None):
+    per_minute = info["rate_limit"] * HEADROOM
+    print(f"Rate limit: {info['rate_limit']} requests/minute "
+          f"(planning with {per_minute:.0f}), latency {info['latency'] * 1000:.0f} ms/request")
+    if info["remaining"] is not None and info["remaining"] < info["rate_limit"] * 0.2:
+        print(f"Warning: only {info['remaining']} requests left this minute; "
+              f"other jobs are using the budget and these estimates are optimistic.")
+
+    total_seconds = 0
+    for resource, resource_plans in plans.items():
+        best = resource_plans[0]
+        total_seconds += best["seconds"]
+        print(f"\n{resource}: {info['counts'][resource]:,} records")
+        for plan in resource_plans:
+            marker = "->" if plan is best else "  "
+            detail = f" in {plan['partitions']} windows" if plan["partitions"] > 1 else ""
+            print(f"  {marker} {plan['strategy']:<12} {plan['requests']:>9,} requests  "
+                  f"~{format_duration(plan['seconds'])}{detail}")
+
+    print(f"\nEstimated total (one after another): ~{format_duration(total_seconds)}")
+    if window_hours is not None and total_seconds > window_hours * 3600:
+        print(f"This will NOT finish inside the {window_hours}h window.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate how long a large Zendesk export will take.")
+    parser.add_argument("--resources", nargs="+", choices=list(COUNT_ENDPOINTS), default=list(COUNT_ENDPOINTS))
+    parser.add_argument("--window", type=float, help="Hours available for the export")
+    parser.add_argument("--incremental-rate", type=int, default=INCREMENTAL_RATE,
+                        help="Incremental export requests per minute (30 with the High Volume add-on)")
+    parser.add_argument("--page-latency", type=float, help="Seconds per page, instead of the measured latency")
+    args = parser.parse_args()
+
+    info = fetch_counts(args.resources)
+    if args.page_latency:
+        info["latency"] = args.page_latency
+    per_minute = info["rate_limit"] * HEADROOM
+    plans = {
+        resource: plan_resource(info["counts"][resource], per_minute, info["latency"], args.incremental_rate)
+        for resource in args.resources
+    }
+    print_plan(info, plans, args.window)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# profiling.py
+"""
+Breaks a run down into where the time went: network, decode, pandas, write...
+
+Code marks its hot spots with named phases:
+
+    with profiling.phase("decode"):
+        data = response.json()
+
+Phases cost one flag check when profiling is off. When it is on, each phase
+adds up its own (exclusive) time, so nested phases are not double counted,
+and the breakdown is printed when the script exits. Every HTTP request made
+through requests is timed as "network" automatically.
+
+Turn it on for any script with the runner:
+    python profiling.py fetch_triggers.py
+    python profiling.py --cprofile run.pstats --flame run.folded fetch_automations.py
+
+Every script also accepts it directly:
+    python fetch_comments_bulk.py --start 2024-01-01 --profile
+    python fetch_comments_bulk.py --start 2024-01-01 --profile=cprofile,flame
+
+--cprofile writes a pstats dump (open with `python -m pstats run.pstats`).
+--flame samples every thread's stack and writes folded stacks, which
+speedscope.app or flamegraph.pl turn into a flame graph.
+"""
+
+import argparse
+import atexit
+import os
+import runpy
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+SAMPLE_INTERVAL = 0.005  # Seconds between flame graph samples
+DEFAULT_CPROFILE_FILE = "profile.pstats"
+DEFAULT_FLAME_FILE = "profile.folded"
+
+_enabled = False
+_started = None
+_lock = threading.Lock()
+_totals = defaultdict(lambda: [0.0, 0])  # phase -> [seconds, calls]
+_local = threading.local()
+_profiler = None
+_sampler = None
+
+
+@contextmanager
+def _timed(name):
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    now = time.perf_counter()
+    if stack:
+        # Pause the enclosing phase while this one runs
+        parent = stack[-1]
+        _add(parent[0], now - parent[1], 0)
+    frame = [name, now]
+    stack.append(frame)
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        stack.pop()
+        _add(name, now - frame[1], 1)
+        if stack:
+            stack[-1][1] = now
+
+
+def _add(name, seconds, calls):
+    with _lock:
+        total = _totals[name]
+        total[0] += seconds
+        total[1] += calls
+
+
+def phase(name):
+    """Times the enclosed block under `name` when profiling is enabled."""
+    if _enabled:
+        return _timed(name)
+    return nullcontext()
+
+
+def timed(name):
+    """Decorator form of phase()."""
+    def decorate(func):
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+    return decorate
+
+
+def _patch_requests():
+    try:
+        from requests.sessions import Session
+    except ImportError:
+        return
+    original = Session.request
+    if getattr(original, "_profiled", False):
+        return
+
+    def request(self, *args, **kwargs):
+        with phase("network"):
+            return original(self, *args, **kwargs)
+
+    request._profiled = True
+    Session.request = request
+
+
+class _Sampler(threading.Thread):
+    """Samples the stack of every other thread into folded-stack counts."""
+
+    def __init__(self, interval):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.interval = interval
+        self.counts = Counter()
+        self.running = True
+
+    def run(self):
+        own = threading.get_ident()
+        while self.running:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.counts[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def save(self, file_name):
+        with open(file_name, "w") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def enable(cprofile_file=None, flame_file=None, interval=SAMPLE_INTERVAL):
+    """Starts phase timing (and optional cProfile/sampling); reports at exit."""
+    global _enabled, _started, _profiler, _sampler
+    if _enabled:
+        return
+    _enabled = True
+    _started = time.perf_counter()
+    _patch_requests()
+
+    if cprofile_file:
+        import cProfile
+
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    if flame_file:
+        _sampler = _Sampler(interval)
+        _sampler.start()
+    atexit.register(report, cprofile_file, flame_file)
+
+
+def report(cprofile_file=None, flame_file=None):
+    """Prints the phase breakdown and writes the cProfile/flame graph files."""
+    wall = time.perf_counter() - _started
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(cprofile_file)
+    if _sampler is not None:
+        _sampler.running = False
+        _sampler.save(flame_file)
+
+    with _lock:
+        phases = sorted(_totals.items(), key=lambda item: item[1][0], reverse=True)
+    tracked = sum(seconds for _, (seconds, _) in phases)
+
+    print(f"\nProfile: {wall:.2f}s wall time", file=sys.stderr)
+    print(f"  {'phase':<32} {'seconds':>9} {'%':>6} {'calls':>9}", file=sys.stderr)
+    for name, (seconds, calls) in phases:
+        print(f"  {name:<32} {seconds:>9.3f} {100 * seconds / wall:>6.1f} {calls:>9}", file=sys.stderr)
+    if tracked < wall:
+        other = wall - tracked
+        print(f"  {'(untracked)':<32} {other:>9.3f} {100 * other / wall:>6.1f}", file=sys.stderr)
+    if cprofile_file:
+        print(f"  cProfile stats written to {cprofile_file}", file=sys.stderr)
+    if flame_file:
+        print(f"  Folded stacks for a flame graph written to {flame_file}", file=sys.stderr)
+
+
+def install_from_argv(argv=None):
+    """
+    Enables profiling when the script was started with --profile.
+
+    The option is removed from argv so the script's own argument parsing
+    never sees it. --profile=cprofile,flame also turns on the cProfile dump
+    and the sampling flame graph.
+    """
+    argv = sys.argv if argv is None else argv
+    for index, arg in enumerate(argv[1:], start=1):
+        if arg == "--profile" or arg.startswith("--profile="):
+            del argv[index]
+            extras = arg.partition("=")[2].split(",")
+            enable(
+                cprofile_file=DEFAULT_CPROFILE_FILE if "cprofile" in extras else None,
+                flame_file=DEFAULT_FLAME_FILE if "flame" in extras else None,
+            )
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a script with the phase profiler enabled.")
+    parser.add_argument("--cprofile", metavar="FILE", help="Also write a cProfile/pstats dump")
+    parser.add_argument("--flame", metavar="FILE", help="Also write sampled folded stacks for a flame graph")
+    parser.add_argument("--interval", type=float, default=SAMPLE_INTERVAL, help="Flame graph sampling interval")
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    sys.argv = [args.script] + args.args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    enable(cprofile_file=args.cprofile, flame_file=args.flame, interval=args.interval)
+    runpy.run_path(args.script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    # Run from the imported module so scripts share its phase timers
+    import profiling
+
+    profiling.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# prune_automations.py
+"""
+Finds unused automations and deletes them in bulk.
+
+Every automation is streamed from the API with its usage counters
+(usage_1h, usage_24h, usage_7d, usage_30d) and filtered as it arrives: an
+automation is a candidate when it ran at most --max-usage times in the
+--window and matches --state. No CSV is written or read in between.
+
+By default this is a dry run that only lists the candidates. With
+--execute they are deleted with destroy_many, 100 IDs per request, several
+requests at a time, through the shared rate limiter and with TLS
+verification on. Deletions are recorded in the journal (op
+"delete_automation", shared with bulk_automations_delete.py), so a re-run
+skips what is already gone.
+
+Usage:
+    python prune_automations.py                                  # never ran in the last 30 days
+    python prune_automations.py --state inactive                 # inactive and unused
+    python prune_automations.py --window 7d --max-usage 2 --execute
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from journal import Journal
+import profiling
+from zendesk_client import paginate, request
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
+
+USAGE_WINDOWS = ("1h", "24h", "7d", "30d")
+DESTROY_MANY_LIMIT = 100  # IDs per destroy_many request
+JOURNAL_OP = "delete_automation"
+
+
+def stream_automations():
+    """Yields every automation with its usage counters."""
+    params = {"page[size]": 100, "include": ",".join(f"usage_{window}" for window in USAGE_WINDOWS)}
+    yield from paginate("/automations", "automations", params)
+
+
+def prune_candidates(automations, window="30d", max_usage=0, state="any"):
+    """
+    Yields the automations that ran at most `max_usage` times in `window` and match `state`.
+
+    An automation without a usage value for the window is never a candidate:
+    missing usage means unknown, not unused.
+    """
+    for automation in automations:
+        if state == "active" and not automation.get("active"):
+            continue
+        if state == "inactive" and automation.get("active"):
+            continue
+        usage = automation.get(f"usage_{window}")
+        if usage is not None and usage <= max_usage:
+            yield automation
+
+
+def destroy_many(ids):
+    """Deletes up to DESTROY_MANY_LIMIT automations in one request."""
+    request("DELETE", "/automations/destroy_many.json", params={"ids": ",".join(map(str, ids))})
+
+
+def delete_automations(automation_ids, journal=None, workers=4):
+    """
+    Deletes automations in chunks of DESTROY_MANY_LIMIT, `workers` chunks at a time.
+
+    Returns:
+        tuple: (number deleted, list of (chunk, error) for the chunks that failed).
+    """
+    journal = journal or Journal()
+    pending_ids = journal.pending(JOURNAL_OP, automation_ids)
+    if len(pending_ids) < len(automation_ids):
+        print(f"Skipping {len(automation_ids) - len(pending_ids)} automations already deleted in a previous run.")
+    chunks = [pending_ids[i:i + DESTROY_MANY_LIMIT] for i in range(0, len(pending_ids), DESTROY_MANY_LIMIT)]
+
+    deleted, failures = 0, []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(destroy_many, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                future.result()
+            except requests.exceptions.RequestException as e:
+                failures.append((chunk, e))
+                print(f"Failed to delete {len(chunk)} automations: {e}")
+                continue
+            # Record each chunk as soon as Zendesk confirms it
+            journal.record(JOURNAL_OP, chunk)
+            deleted += len(chunk)
+            print(f"Deleted {deleted}/{len(pending_ids)} automations...")
+    return deleted, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete automations that are not being used.")
+    parser.add_argument("--window", choices=USAGE_WINDOWS, default="30d", help="Usage window to look at")
+    parser.add_argument("--max-usage", type=int, default=0, help="Most runs in the window that still count as unused")
+    parser.add_argument("--state", choices=["any", "active", "inactive"], default="any")
+    parser.add_argument("--execute", action="store_true", help="Delete the candidates (default: dry run)")
+    parser.add_argument("--workers", type=int, default=4, help="destroy_many requests in flight")
+    args = parser.parse_args()
+
+    usage_key = f"usage_{args.window}"
+    total = without_usage = 0
+
+    def counted(automations):
+        nonlocal total, without_usage
+        for automation in automations:
+            total += 1
+            if automation.get(usage_key) is None:
+                without_usage += 1
+            yield automation
+
+    candidates = list(prune_candidates(counted(stream_automations()), args.window, args.max_usage, args.state))
+    if total and without_usage == total:
+        raise SystemExit(f"Zendesk returned no {usage_key} for any automation; the usage sideload is missing, "
+                         f"so nothing can be judged unused. Aborting.")
+    if without_usage:
+        print(f"Warning: {without_usage} automations have no {usage_key} and were kept.")
+    print(f"{len(candidates)} of {total} automations ran at most {args.max_usage} times in the last {args.window}"
+          + ("" if args.state == "any" else f" and are {args.state}") + ":")
+    for automation in sorted(candidates, key=lambda automation: automation.get("position") or 0):
+        state = "active" if automation.get("active") else "inactive"
+        print(f"  {automation['id']:>14}  {state:<8}  {automation[usage_key]:>5} runs  "
+              f"{automation.get('title')}")
+
+    if not candidates:
+        return
+    if not args.execute:
+        print("\nDry run: nothing was deleted. Re-run with --execute to delete these automations.")
+        return
+
+    deleted, failures = delete_automations([automation["id"] for automation in candidates], workers=args.workers)
+    print(f"\nDeleted {deleted} automations.")
+    if failures:
+        print(f"{sum(len(chunk) for chunk, _ in failures)} automations in {len(failures)} requests were not "
+              f"deleted; re-run to retry them.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# rate_limiter.py
+"""
+Host-wide rate limiter shared by every script running against one Zendesk account.
+
+Each running script registers itself in a small JSON state file in the temp
+directory (guarded by a file lock) and gets its own token bucket. The
+account's per-minute budget is split between the live scripts in
+proportion to their priority, so three scripts started side by side stay
+under the limit together instead of each assuming it has the whole budget.
+When any script gets a 429, every script pauses until Retry-After passes.
+
+Configuration (.env or environment):
+    ZENDESK_RATE_LIMIT=700        # requests per minute for your plan
+    ZENDESK_RATE_PRIORITY=1       # this script's share weight (e.g. 3 for interactive jobs)
+
+Show who is currently sharing the budget:
+    python rate_limiter.py
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, each script paces itself alone
+    fcntl = None
+
+DEFAULT_RATE_LIMIT = 700  # Requests per minute on Enterprise plans
+HEADROOM = 0.9  # Stay just under the account limit
+BURST_SECONDS = 5  # How much unused budget a script may save up
+STALE_AFTER = 60  # Seconds before an unseen script is dropped from the split
+
+_disabled = False
+
+
+def _pid_alive(pid):
+    if os.name == "nt":  # os.kill would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RateLimiter:
+    """
+    Example:
+        limiter = RateLimiter("mysubdomain", priority=2)
+        limiter.acquire()          # blocks until this script may send a request
+        response = requests.get(...)
+        if response.status_code == 429:
+            limiter.penalize(int(response.headers.get("Retry-After", 60)))
+    """
+
+    def __init__(self, account, priority=1, per_minute=DEFAULT_RATE_LIMIT, state_dir=None):
+        state_dir = state_dir or tempfile.gettempdir()
+        self.path = os.path.join(state_dir, f"zendesk_rate_{account}.json")
+        self.lock_path = self.path + ".lock"
+        self.priority = max(1, int(priority))
+        self.per_minute = per_minute
+        self.key = str(os.getpid())
+        atexit.register(self.release)
+
+    @contextmanager
+    def _locked_state(self):
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.path) as f:
+                        state = json.load(f)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    state = {}
+                state.setdefault("procs", {})
+                state.setdefault("paused_until", 0)
+                yield state
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _rate(self, procs):
+        """This script's share of the budget, in requests per second."""
+        total_priority = sum(proc["priority"] for proc in procs.values())
+        return self.per_minute * HEADROOM / 60.0 * self.priority / total_priority
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` requests may be sent, then spends them."""
+        if _disabled:
+            return
+        while True:
+            with self._locked_state() as state:
+                now = time.time()
+                procs = state["procs"]
+                for key in list(procs):
+                    if key != self.key and (now - procs[key]["seen"] > STALE_AFTER or not _pid_alive(int(key))):
+                        del procs[key]
+
+                me = procs.setdefault(self.key, {"priority": self.priority, "tokens": 0.0, "seen": now})
+                rate = self._rate(procs)
+                me["tokens"] = min(max(rate * BURST_SECONDS, tokens), me["tokens"] + (now - me["seen"]) * rate)
+                me["seen"] = now
+                me["priority"] = self.priority
+
+                if now < state["paused_until"]:
+                    wait = state["paused_until"] - now
+                elif me["tokens"] >= tokens:
+                    me["tokens"] -= tokens
+                    return
+                else:
+                    wait = (tokens - me["tokens"]) / rate
+            # Re-check at least once a second so shares follow scripts starting and stopping
+            time.sleep(min(wait, 1.0))
+
+    def penalize(self, retry_after):
+        """Pauses every script sharing the account after a 429."""
+        with self._locked_state() as state:
+            state["paused_until"] = max(state["paused_until"], time.time() + retry_after)
+
+    def release(self):
+        """Gives this script's share back to the others."""
+        try:
+            with self._locked_state() as state:
+                state["procs"].pop(self.key, None)
+        except OSError:
+            pass
+
+
+_limiter = None
+
+
+def disable():
+    """Stops all pacing in this process, e.g. when responses are replayed from disk."""
+    global _disabled
+    _disabled = True
+
+
+def get_rate_limiter():
+    """Returns this process's limiter for the account in ZENDESK_SUBDOMAIN."""
+    global _limiter
+    if _limiter is None:
+        # Read lazily so values from .env are picked up whatever the import order
+        _limiter = RateLimiter(
+            os.getenv("ZENDESK_SUBDOMAIN", "default"),
+            priority=int(os.getenv("ZENDESK_RATE_PRIORITY", "1")),
+            per_minute=int(os.getenv("ZENDESK_RATE_LIMIT", DEFAULT_RATE_LIMIT)),
+        )
+    return _limiter
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv(".env")
+    limiter = get_rate_limiter()
+    atexit.unregister(limiter.release)
+    try:
+        with open(limiter.path) as f:
+            procs = json.load(f).get("procs", {})
+    except FileNotFoundError:
+        procs = {}
+    live = {pid: proc for pid, proc in procs.items() if _pid_alive(int(pid))}
+    total = sum(proc["priority"] for proc in live.values()) or 1
+    print(f"Budget: {limiter.per_minute * HEADROOM:.0f} requests/minute, shared by {len(live)} scripts")
+    for pid, proc in live.items():
+        print(f"  pid {pid}: priority {proc['priority']}, "
+              f"{limiter.per_minute * HEADROOM * proc['priority'] / total:.0f} requests/minute")
@@ -0,0 +1,501 @@
+"""
+Compiles Zendesk condition trees into vectorized predicates over a local ticket set.
+
+Triggers, automations, SLA policies and views all describe which tickets
+they apply to with the same {"all": [...], "any": [...]} lists of
+{field, operator, value} conditions. `compile_conditions` turns such a tree
+into predicates that each produce a NumPy boolean mask over every ticket at
+once, so thousands of rules can be checked against a million exported
+tickets without a Python loop per ticket. Masks are cached on the TicketSet
+by (field, operator, value), so a condition shared by many rules (e.g.
+status is open) is computed once.
+
+Conditions that cannot be judged from a snapshot of the ticket (changed,
+changed_to, current user role, ...) are reported as unsupported rather than
+guessed. By default they are left out of the match, which makes results an
+upper bound; pass strict=True to treat them as never matching.
+
+Ticket exports are read with `load_tickets` from JSON (fetch_tickets.py,
+tickets_missing_category.py), JSON Lines (output_writer shards, by manifest)
+or CSV (e.g. ticket_metrics.csv.gz).
+"""
+
+import ast
+import gzip
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+STATUS_ORDER = {"new": 0, "open": 1, "pending": 2, "hold": 3, "solved": 4, "closed": 5}
+PRIORITY_ORDER = {"low": 0, "normal": 1, "high": 2, "urgent": 3}
+TICKET_TYPES = {"1": "question", "2": "incident", "3": "problem", "4": "task"}
+VIA_IDS = {"0": "web", "4": "email", "5": "api", "29": "chat"}
+
+# Condition field -> ticket column compared as a plain value
+SCALAR_FIELDS = {
+    "status": "status",
+    "priority": "priority",
+    "type": "type",
+    "ticket_type_id": "type",
+    "group_id": "group_id",
+    "assignee_id": "assignee_id",
+    "requester_id": "requester_id",
+    "organization_id": "organization_id",
+    "brand_id": "brand_id",
+    "ticket_form_id": "ticket_form_id",
+    "recipient": "recipient",
+    "via_id": "via_channel",
+}
+ORDERED_FIELDS = {"status": STATUS_ORDER, "priority": PRIORITY_ORDER}
+
+# Automation "hours since" fields -> timestamp column
+HOURS_SINCE_FIELDS = {
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "SOLVED": "solved_at",
+    "assigned_at": "assigned_at",
+    "requester_updated_at": "requester_updated_at",
+    "assignee_updated_at": "assignee_updated_at",
+    "due_date": "due_at",
+}
+
+TEXT_FIELDS = {"subject_includes_word": ["subject"], "comment_includes_word": ["subject", "description"]}
+
+CUSTOM_FIELD = re.compile(r"^custom_fields_(\d+)$")
+
+COMPARISONS = {
+    "less_than": np.less,
+    "greater_than": np.greater,
+    "less_than_equal": np.less_equal,
+    "greater_than_equal": np.greater_equal,
+}
+
+
+class UnsupportedCondition(Exception):
+    """A condition that cannot be evaluated against a ticket snapshot."""
+
+
+def _parse_list(value):
+    if isinstance(value, (list, tuple)):
+        return value
+    if isinstance(value, str) and value.startswith(("[", "(")):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return ast.literal_eval(value)
+    return []
+
+
+def _value_string(value):
+    if value is None or value is False:
+        return ""
+    if isinstance(value, list):
+        return " ".join(map(str, value))
+    return str(value)
+
+
+def _map_unique(series, func):
+    """Series.map that calls func once per distinct value (exports repeat the same tag and field lists a lot)."""
+    try:
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    except TypeError:
+        return series.map(func)  # Lists straight from JSON are not hashable
+    results = np.empty(len(uniques), dtype=object)
+    results[:] = [func(value) for value in uniques]
+    return pd.Series(results[codes], index=series.index)
+
+
+def _read_json_lines(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_tickets(path):
+    """
+    Reads an exported ticket set into a DataFrame.
+
+    Args:
+        path (str): .json (a list, {"tickets": [...]} or {id: ticket}),
+            .jsonl / .jsonl.gz, an output_writer .manifest.json, or .csv / .csv.gz.
+    """
+    if path.endswith(".manifest.json"):
+        with open(path) as f:
+            manifest = json.load(f)
+        if not manifest.get("complete", True):
+            raise ValueError(f"{path} is from an export that did not finish; re-run the export first")
+        directory = os.path.dirname(path)
+        shards = [os.path.join(directory, shard["path"]) for shard in manifest["shards"]]
+        if manifest["format"] == "csv":
+            return pd.concat([pd.read_csv(shard) for shard in shards], ignore_index=True)
+        return pd.DataFrame([row for shard in shards for row in _read_json_lines(shard)])
+    if ".csv" in os.path.basename(path):
+        return pd.read_csv(path)
+    if ".jsonl" in os.path.basename(path):
+        return pd.DataFrame(_read_json_lines(path))
+
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("tickets", data)
+    if isinstance(data, dict):
+        # {ticket_id: ticket} as written by fetch_tickets.py
+        data = [dict(ticket, id=ticket.get("id", ticket_id)) for ticket_id, ticket in data.items()]
+    return pd.DataFrame(data)
+
+
+class TicketSet:
+    """
+    A ticket DataFrame prepared for vectorized condition checks.
+
+    Args:
+        tickets (DataFrame or list): Exported tickets.
+        now (Timestamp, optional): Reference time for "hours since" conditions.
+        update_type (str): "Create" or "Change", for triggers' update_type condition.
+    """
+
+    def __init__(self, tickets, now=None, update_type="Change"):
+        frame = tickets if isinstance(tickets, pd.DataFrame) else pd.DataFrame(list(tickets))
+        self.frame = frame.reset_index(drop=True)
+        self.size = len(self.frame)
+        self.now = now if now is not None else pd.Timestamp.now(tz="UTC")
+        self.update_type = update_type
+        self.masks = {}
+        self.unavailable = {}
+        self._strings = {}
+        self._tag_positions = None
+        self._custom_fields = None
+
+    def empty(self, fill=False):
+        return np.full(self.size, fill, dtype=bool)
+
+    def strings(self, column):
+        """The column as an array of strings, "" where the ticket has no value."""
+        values = self._strings.get(column)
+        if values is None:
+            if column == "via_channel" and column not in self.frame:
+                source = self.frame["via"].map(lambda via: via.get("channel") if isinstance(via, dict) else None) \
+                    if "via" in self.frame else pd.Series([None] * self.size)
+            elif column not in self.frame:
+                source = pd.Series([None] * self.size)
+            else:
+                source = self.frame[column]
+            if pd.api.types.is_float_dtype(source):
+                # IDs read from CSV come back as floats when some are missing
+                source = source.astype("Int64")
+            values = source.astype("string").fillna("").to_numpy(dtype=object, copy=True)
+            self._strings[column] = values
+        return values
+
+    def tag_positions(self):
+        """tag -> positions of the tickets that have it."""
+        if self._tag_positions is None:
+            tags = self.frame["tags"] if "tags" in self.frame else pd.Series([[]] * self.size)
+            tags = _map_unique(tags, lambda value: value.split() if isinstance(value, str)
+                               and not value.startswith("[") else _parse_list(value))
+            long = tags.explode().dropna()
+            rows = long.index.to_numpy()
+            self._tag_positions = {
+                tag: rows[positions] for tag, positions in pd.Series(rows).groupby(long.to_numpy()).indices.items()
+            }
+        return self._tag_positions
+
+    def tag_mask(self, tags):
+        mask = self.empty()
+        positions = self.tag_positions()
+        for tag in tags:
+            if tag in positions:
+                mask[positions[tag]] = True
+        return mask
+
+    def custom_field(self, field_id):
+        """Values of one custom field as strings ("" when unset)."""
+        if self._custom_fields is None:
+            column = "custom_fields" if "custom_fields" in self.frame else "fields"
+            lists = _map_unique(self.frame[column], _parse_list) if column in self.frame else pd.Series([[]] * self.size)
+            long = lists.explode().dropna()
+            items = [item if isinstance(item, dict) else {"id": item[0], "value": item[1]} for item in long]
+            ids = np.array([str(item.get("id")) for item in items], dtype=object)
+            values = np.array([_value_string(item.get("value")) for item in items], dtype=object)
+            rows = long.index.to_numpy()
+            self._custom_fields = {
+                field: (rows[positions], values[positions])
+                for field, positions in pd.Series(rows).groupby(ids).indices.items()
+            } if len(items) else {}
+        result = np.full(self.size, "", dtype=object)
+        if field_id in self._custom_fields:
+            rows, values = self._custom_fields[field_id]
+            result[rows] = values
+        return result
+
+    def hours_since(self, column):
+        if column not in self.frame:
+            raise UnsupportedCondition(f"tickets have no {column} column")
+        times = pd.to_datetime(self.frame[column], utc=True, errors="coerce")
+        return ((self.now - times).dt.total_seconds() / 3600.0).to_numpy()
+
+    def text(self, columns):
+        parts = [self.frame[column].fillna("").astype(str) for column in columns if column in self.frame]
+        if not parts:
+            raise UnsupportedCondition(f"tickets have no {'/'.join(columns)} text")
+        text = parts[0]
+        for part in parts[1:]:
+            text = text + "\n" + part
+        return text.str.lower()
+
+    # Simulated actions (rule_simulator.py) change tickets in place. The cached
+    # masks of conditions on the changed column are dropped, so rules later in
+    # position order see the change.
+
+    def set_values(self, column, rows, value):
+        self.strings(column)[rows] = value
+        self._invalidate(column)
+
+    def add_tags(self, rows, tags):
+        positions = self.tag_positions()
+        for tag in tags:
+            positions[tag] = np.union1d(positions.get(tag, np.empty(0, dtype=rows.dtype)), rows)
+        self._invalidate("tags")
+
+    def remove_tags(self, rows, tags=None):
+        """Removes `tags` (every tag when None) from the given tickets."""
+        positions = self.tag_positions()
+        selected = self.empty()
+        selected[rows] = True
+        for tag in list(positions) if tags is None else tags:
+            if tag in positions:
+                positions[tag] = positions[tag][~selected[positions[tag]]]
+        self._invalidate("tags")
+
+    def set_custom_field(self, field_id, rows, value):
+        values = self.custom_field(field_id)
+        values[rows] = value
+        self._custom_fields[field_id] = (np.arange(self.size), values)
+        self._invalidate(f"custom_fields_{field_id}")
+
+    def _invalidate(self, column):
+        self.masks = {key: mask for key, mask in self.masks.items() if _condition_column(key[0]) != column}
+
+
+def _condition_column(field):
+    """The TicketSet column a condition field is evaluated on."""
+    if field == "current_tags":
+        return "tags"
+    return SCALAR_FIELDS.get(field, field)
+
+
+def _words(value):
+    return [word for word in re.split(r"[\s,]+", str(value or "").strip()) if word]
+
+
+def _scalar_predicate(field, operator, value):
+    column = SCALAR_FIELDS[field]
+    value = "" if value is None else str(value)
+    if field == "ticket_type_id":
+        value = TICKET_TYPES.get(value, value)
+    if field == "via_id":
+        if value not in VIA_IDS:
+            raise UnsupportedCondition(f"via_id {value} has no known channel")
+        value = VIA_IDS[value]
+
+    if operator in ("is", "is_not"):
+        def predicate(tickets):
+            mask = tickets.strings(column) == value
+            return mask if operator == "is" else ~mask
+        return predicate
+
+    if operator in COMPARISONS and field in ORDERED_FIELDS:
+        order = ORDERED_FIELDS[field]
+        if value not in order:
+            raise UnsupportedCondition(f"unknown {field} '{value}'")
+        compare = COMPARISONS[operator]
+
+        def predicate(tickets):
+            ranks = pd.Series(tickets.strings(column)).map(order).to_numpy(dtype=float)
+            return compare(np.nan_to_num(ranks, nan=-1), order[value]) & ~np.isnan(ranks)
+        return predicate
+
+    raise UnsupportedCondition(f"operator '{operator}' on {field}")
+
+
+def _custom_field_predicate(field_id, operator, value):
+    if isinstance(value, list):
+        value = " ".join(map(str, value))
+    value = "" if value is None else str(value)
+
+    def values(tickets):
+        return tickets.custom_field(field_id)
+
+    if operator in ("is", "is_not"):
+        def predicate(tickets):
+            mask = values(tickets) == value
+            return mask if operator == "is" else ~mask
+    elif operator in ("present", "not_present"):
+        def predicate(tickets):
+            mask = values(tickets) != ""
+            return mask if operator == "present" else ~mask
+    elif operator in ("includes", "not_includes"):
+        wanted = set(value.split())
+
+        def predicate(tickets):
+            mask = np.fromiter((bool(wanted & set(item.split())) for item in values(tickets)),
+                               dtype=bool, count=tickets.size)
+            return mask if operator == "includes" else ~mask
+    elif operator in COMPARISONS:
+        compare = COMPARISONS[operator]
+        try:
+            number = float(value)
+        except ValueError:
+            raise UnsupportedCondition(f"{operator} on custom field {field_id} with '{value}'")
+
+        def predicate(tickets):
+            numbers = pd.to_numeric(pd.Series(values(tickets)), errors="coerce").to_numpy()
+            return compare(np.nan_to_num(numbers, nan=np.inf if operator.startswith("less") else -np.inf), number)
+    else:
+        raise UnsupportedCondition(f"operator '{operator}' on custom field {field_id}")
+    return predicate
+
+
+def _hours_predicate(field, operator, value):
+    column = HOURS_SINCE_FIELDS[field]
+    try:
+        hours = float(value)
+    except (TypeError, ValueError):
+        raise UnsupportedCondition(f"{field} with value '{value}'")
+
+    def predicate(tickets):
+        elapsed = tickets.hours_since(column)
+        valid = ~np.isnan(elapsed)
+        elapsed = np.nan_to_num(elapsed)
+        if operator == "is":
+            return valid & (np.floor(elapsed) == hours)
+        return valid & COMPARISONS[operator](elapsed, hours)
+
+    if operator != "is" and operator not in COMPARISONS:
+        raise UnsupportedCondition(f"operator '{operator}' on {field}")
+    return predicate
+
+
+def _text_predicate(field, operator, value):
+    columns = TEXT_FIELDS[field]
+    words = [word.lower() for word in _words(value)]
+    if not words:
+        raise UnsupportedCondition(f"{field} without words")
+    if operator in ("includes", "not_includes"):
+        pattern = r"\b(?:" + "|".join(map(re.escape, words)) + r")\b"
+    elif operator in ("is", "is_not"):
+        pattern = r"\b" + r"\s+".join(map(re.escape, words)) + r"\b"
+    else:
+        raise UnsupportedCondition(f"operator '{operator}' on {field}")
+
+    def predicate(tickets):
+        mask = tickets.text(columns).str.contains(pattern, regex=True).to_numpy(dtype=bool)
+        return mask if operator in ("includes", "is") else ~mask
+    return predicate
+
+
+def compile_condition(condition):
+    """Returns a predicate (TicketSet -> bool mask) or raises UnsupportedCondition."""
+    field = condition.get("field", "")
+    operator = condition.get("operator", "is")
+    value = condition.get("value")
+
+    if field == "current_tags":
+        tags = _words(value)
+        if operator not in ("includes", "not_includes"):
+            raise UnsupportedCondition(f"operator '{operator}' on current_tags")
+
+        def predicate(tickets):
+            mask = tickets.tag_mask(tags)
+            return mask if operator == "includes" else ~mask
+        return predicate
+
+    if field == "update_type":
+        def predicate(tickets):
+            matches = tickets.update_type.lower() == str(value).lower()
+            return tickets.empty(matches if operator == "is" else not matches)
+        return predicate
+
+    match = CUSTOM_FIELD.match(field)
+    if match:
+        return _custom_field_predicate(match.group(1), operator, value)
+    if field in SCALAR_FIELDS:
+        return _scalar_predicate(field, operator, value)
+    if field in HOURS_SINCE_FIELDS:
+        return _hours_predicate(field, operator, value)
+    if field in TEXT_FIELDS:
+        return _text_predicate(field, operator, value)
+    raise UnsupportedCondition(f"field '{field}'")
+
+
+def _condition_key(condition):
+    return (condition.get("field"), condition.get("operator"), json.dumps(condition.get("value"), sort_keys=True))
+
+
+class CompiledConditions:
+    """
+    Example:
+        compiled = compile_conditions(trigger["conditions"])
+        mask = compiled.evaluate(TicketSet(tickets))
+        compiled.unsupported   # [(condition, reason), ...]
+    """
+
+    def __init__(self, conditions, strict=False):
+        conditions = conditions or {}
+        self.strict = strict
+        self.unsupported = []
+        self.all = self._compile(conditions.get("all") or [])
+        self.any = self._compile(conditions.get("any") or [])
+        self.any_given = bool(conditions.get("any"))
+
+    def _compile(self, conditions):
+        compiled = []
+        for condition in conditions:
+            try:
+                compiled.append((condition, _condition_key(condition), compile_condition(condition)))
+            except UnsupportedCondition as e:
+                self.unsupported.append((condition, str(e)))
+        return compiled
+
+    def _mask(self, tickets, condition, key, predicate):
+        if key not in tickets.masks:
+            try:
+                tickets.masks[key] = predicate(tickets)
+            except UnsupportedCondition as e:
+                # Supported in general, but the exported tickets lack the data
+                tickets.masks[key] = None
+                tickets.unavailable[key] = str(e)
+        mask = tickets.masks[key]
+        if mask is None and (condition, tickets.unavailable[key]) not in self.unsupported:
+            self.unsupported.append((condition, tickets.unavailable[key]))
+        return mask
+
+    def evaluate(self, tickets):
+        """Returns the boolean mask of the tickets that match."""
+        if self.strict and self.unsupported:
+            return tickets.empty()
+
+        result = tickets.empty(True)
+        for condition, key, predicate in self.all:
+            mask = self._mask(tickets, condition, key, predicate)
+            if mask is None:
+                if self.strict:
+                    return tickets.empty()
+                continue
+            result &= mask
+
+        if self.any_given:
+            any_masks = [self._mask(tickets, condition, key, predicate) for condition, key, predicate in self.any]
+            any_masks = [mask for mask in any_masks if mask is not None]
+            if any_masks:
+                result &= np.logical_or.reduce(any_masks)
+            elif self.strict:
+                return tickets.empty()
+        return result
+
+
+def compile_conditions(conditions, strict=False):
+    return CompiledConditions(conditions, strict=strict)
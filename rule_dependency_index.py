@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# rule_dependency_index.py
+"""
+Answers "which triggers and automations break if I delete X?" instantly.
+
+Every trigger and automation is parsed once and every field, tag, group,
+user, brand, form, target/webhook and custom field it references (in its
+conditions or actions) becomes a key in an inverted index. The index is
+saved to rule_dependency_index.json next to the other exports, so lookups
+are a dictionary access instead of a grep through thousands of rules.
+
+Usage:
+    python rule_dependency_index.py build                    # fetch all rules from Zendesk
+    python rule_dependency_index.py build --from-exports     # use fetch_triggers/fetch_automations CSVs
+    python rule_dependency_index.py query tag vip
+    python rule_dependency_index.py query group 360001234567
+    python rule_dependency_index.py query ticket_field 360009876543
+    python rule_dependency_index.py query field priority
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+from collections import defaultdict
+
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
+
+INDEX_FILE = "rule_dependency_index.json"
+
+# Condition/action fields whose value is a space-separated list of tags
+TAG_FIELDS = {"current_tags", "set_tags", "remove_tags"}
+
+# Fields whose value is the ID of another Zendesk object
+ID_FIELDS = {
+    "group_id": "group",
+    "assignee_id": "user",
+    "requester_id": "user",
+    "organization_id": "organization",
+    "brand_id": "brand",
+    "ticket_form_id": "ticket_form",
+    "via_id": "channel",
+    "schedule_id": "schedule",
+    "locale_id": "locale",
+}
+
+# Actions whose value is a list starting with the ID of the recipient or target
+NOTIFICATION_FIELDS = {
+    "notification_group": "group",
+    "notification_user": "user",
+    "notification_target": "target",
+    "notification_webhook": "webhook",
+}
+
+CUSTOM_FIELD = re.compile(r"^custom_fields_(\d+)$")
+
+
+def references(field, value):
+    """Yields the (kind, key) pairs a single condition or action refers to."""
+    yield "field", field
+
+    match = CUSTOM_FIELD.match(field)
+    if match:
+        yield "ticket_field", match.group(1)
+        if value not in (None, ""):
+            yield "ticket_field_value", f"{match.group(1)}={value}"
+        return
+
+    if field in TAG_FIELDS and isinstance(value, str):
+        for tag in value.split():
+            yield "tag", tag
+    elif field in ID_FIELDS and value not in (None, "", "current_user", "current_groups", "requester_id"):
+        yield ID_FIELDS[field], str(value)
+    elif field in NOTIFICATION_FIELDS and isinstance(value, list) and value:
+        yield NOTIFICATION_FIELDS[field], str(value[0])
+
+
+def build_dependency_index(rules):
+    """
+    Builds the inverted index.
+
+    Args:
+        rules (iterable): (rule_type, rule) pairs where rule has id, title,
+            active, conditions and actions as returned by the API.
+
+    Returns:
+        dict: "kind:key" -> list of {"type", "id", "title", "active", "where"}.
+    """
+    index = defaultdict(list)
+    for rule_type, rule in rules:
+        summary = {
+            "type": rule_type,
+            "id": str(rule.get("id")),
+            "title": rule.get("title"),
+            "active": rule.get("active"),
+        }
+        seen = set()
+        conditions = rule.get("conditions") or {}
+        parts = [(f"conditions.{group}", conditions.get(group) or []) for group in ("all", "any")]
+        parts.append(("actions", rule.get("actions") or []))
+
+        for where, items in parts:
+            for item in items:
+                for kind, key in references(item.get("field", ""), item.get("value")):
+                    entry_key = (f"{kind}:{key}", where)
+                    if entry_key in seen:
+                        continue
+                    seen.add(entry_key)
+                    index[entry_key[0]].append(dict(summary, where=where))
+    return dict(index)
+
+
+def _parse_bool(value):
+    return str(value).strip().lower() == "true"
+
+
+def load_rules_from_exports(directory="."):
+    """Reads the newest trigger CSV and the automation CSV written by the fetch scripts."""
+    trigger_files = sorted(glob.glob(os.path.join(directory, "zendesk_triggers_*.csv")))
+    if trigger_files:
+        with open(trigger_files[-1], newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield "trigger", {
+                    "id": row["Trigger ID"],
+                    "title": row["Title"],
+                    "active": _parse_bool(row["Active"]),
+                    "position": int(row.get("Position") or 0),
+                    "conditions": json.loads(row["Conditions"]),
+                    "actions": json.loads(row["Actions"]),
+                }
+
+    automation_file = os.path.join(directory, "zendesk_automations.csv")
+    if os.path.exists(automation_file):
+        with open(automation_file, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield "automation", {
+                    "id": row["id"],
+                    "title": row["title"],
+                    "active": _parse_bool(row["active"]),
+                    "position": int(float(row.get("position") or 0)),
+                    "conditions": json.loads(row["conditions"]),
+                    "actions": json.loads(row["actions"]),
+                }
+
+
+def load_rules_from_zendesk():
+    """Streams every trigger and automation from the API."""
+    from zendesk_client import paginate
+
+    for trigger in paginate("/triggers", "triggers", {"page[size]": 100}):
+        yield "trigger", trigger
+    for automation in paginate("/automations", "automations", {"page[size]": 100}):
+        yield "automation", automation
+
+
+def save_dependency_index(index, file_name=INDEX_FILE):
+    with open(file_name, "w") as f:
+        json.dump(index, f)
+    print(f"Indexed {len(index)} referenced items into {file_name}")
+
+
+def load_dependency_index(file_name=INDEX_FILE):
+    with open(file_name) as f:
+        return json.load(f)
+
+
+def rules_referencing(index, kind, key):
+    """Returns the rules that reference `key` of the given kind (e.g. "tag", "vip")."""
+    return index.get(f"{kind}:{key}", [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the triggers and automations that reference something.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Build the index")
+    build.add_argument("--from-exports", action="store_true",
+                       help="Read the CSVs from fetch_triggers.py and fetch_automations.py instead of the API")
+    query = subparsers.add_parser("query", help="Look up what references an item")
+    query.add_argument("kind", help="field, tag, group, user, organization, brand, ticket_form, "
+                                    "ticket_field, ticket_field_value, target, webhook...")
+    query.add_argument("key")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        rules = load_rules_from_exports() if args.from_exports else load_rules_from_zendesk()
+        save_dependency_index(build_dependency_index(rules))
+        return
+
+    matches = rules_referencing(load_dependency_index(), args.kind, args.key)
+    if not matches:
+        print(f"No triggers or automations reference {args.kind} '{args.key}'.")
+        return
+    print(f"{len(matches)} references to {args.kind} '{args.key}':")
+    for match in matches:
+        state = "active" if match["active"] else "inactive"
+        print(f"  {match['type']} {match['id']} ({state}) in {match['where']}: {match['title']}")
+
+
+if __name__ == "__main__":
+    main()
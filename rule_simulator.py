@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# rule_simulator.py
+"""
+Replays triggers and automations against a local ticket export.
+
+Every rule's conditions are compiled once (rule_conditions.py) into
+vectorized predicates, and rules are run in `position` order over all
+tickets at once, the way Zendesk runs them on each ticket:
+
+    triggers      evaluated as if every ticket had just been updated (or
+                  created, with --update-type Create). A trigger that fires
+                  applies its ticket actions (status, priority, type, group,
+                  assignee, brand, form, tags, custom fields) before the next
+                  trigger is checked, and the cycle repeats until no trigger
+                  fires again; each trigger fires at most once per ticket.
+    automations   one hourly run at --now, in position order, with the
+                  "hours since" conditions measured from --now.
+
+Triggers and automations are simulated separately, each from the exported
+state of the tickets. Notifications, webhooks and other actions that do not
+change ticket fields are not modelled.
+
+The report lists which rules fire on which tickets (rule_simulation.csv),
+rules that never match anything, and conditions that could not be judged
+from the export. Unsupported conditions are left out of the match, so
+counts are an upper bound unless --strict is given.
+
+Large ticket sets are simulated in chunks, optionally in parallel processes.
+
+Usage:
+    python rule_simulator.py --tickets tickets.json
+    python rule_simulator.py --tickets ticket_metrics.csv.gz --from-exports
+    python rule_simulator.py --tickets tickets.json --update-type Create --only triggers
+    python rule_simulator.py --tickets tickets.json --only automations --now 2024-06-03T09:00:00Z
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import profiling
+from rule_conditions import CUSTOM_FIELD, TicketSet, _value_string, compile_conditions, load_tickets
+from rule_dependency_index import load_rules_from_exports, load_rules_from_zendesk
+from transform_pool import configured_processes, transform
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
+
+OUTPUT_FILE = "rule_simulation.csv"
+SUMMARY_FILE = "rule_simulation_summary.csv"
+CHUNK_SIZE = 250000
+MAX_TRIGGER_PASSES = 10
+
+# Action field -> ticket column it sets
+FIELD_ACTIONS = {
+    "status": "status",
+    "priority": "priority",
+    "type": "type",
+    "group_id": "group_id",
+    "assignee_id": "assignee_id",
+    "brand_id": "brand_id",
+    "ticket_form_id": "ticket_form_id",
+}
+
+
+def load_rules(from_exports=False, include_inactive=False):
+    """Returns {"trigger": [...], "automation": [...]}, each sorted by position."""
+    rules = {"trigger": [], "automation": []}
+    loaded = load_rules_from_exports() if from_exports else load_rules_from_zendesk()
+    for kind, rule in loaded:
+        if rule.get("active", True) or include_inactive:
+            rules[kind].append(rule)
+    for kind in rules:
+        rules[kind].sort(key=lambda rule: rule.get("position") or 0)
+    return rules
+
+
+def apply_actions(tickets, actions, rows):
+    """Applies the ticket-changing actions of one rule to the tickets at `rows`."""
+    for action in actions or []:
+        field, value = action.get("field", ""), action.get("value")
+        if field in FIELD_ACTIONS:
+            if value == "current_user":
+                continue  # Depends on who made the update
+            tickets.set_values(FIELD_ACTIONS[field], rows, _value_string(value))
+        elif field == "current_tags":
+            tickets.add_tags(rows, _value_string(value).split())
+        elif field == "remove_tags":
+            tickets.remove_tags(rows, _value_string(value).split())
+        elif field == "set_tags":
+            tickets.remove_tags(rows)
+            tickets.add_tags(rows, _value_string(value).split())
+        elif CUSTOM_FIELD.match(field):
+            tickets.set_custom_field(CUSTOM_FIELD.match(field).group(1), rows, _value_string(value))
+
+
+def run_rules(tickets, rules, passes=1, strict=False):
+    """
+    Runs rules in order over a TicketSet.
+
+    Args:
+        tickets (TicketSet): Tickets to run on; changed in place by the actions.
+        rules (list): Rules sorted by position.
+        passes (int): Maximum passes over the rules. A rule fires at most once
+            per ticket; passes stop early once nothing new fires.
+        strict (bool): Treat unsupported conditions as never matching.
+
+    Returns:
+        tuple: (list of fired masks, list of compiled conditions), one per rule.
+    """
+    compiled = [compile_conditions(rule.get("conditions"), strict=strict) for rule in rules]
+    fired = [tickets.empty() for _ in rules]
+    for _ in range(passes):
+        fired_any = False
+        for index, rule in enumerate(rules):
+            mask = compiled[index].evaluate(tickets) & ~fired[index]
+            if not mask.any():
+                continue
+            fired[index] |= mask
+            fired_any = True
+            apply_actions(tickets, rule.get("actions"), np.flatnonzero(mask))
+        if not fired_any:
+            break
+    return fired, compiled
+
+
+def simulate_chunk(tickets, rules, update_type, now, strict):
+    """
+    Simulates every rule kind on one chunk of tickets.
+
+    Returns:
+        dict: kind -> list of (fired ticket IDs, unsupported [(condition, reason)]) per rule.
+    """
+    results = {}
+    for kind, kind_rules in rules.items():
+        ticket_set = TicketSet(tickets, now=now, update_type=update_type)
+        passes = MAX_TRIGGER_PASSES if kind == "trigger" else 1
+        fired, compiled = run_rules(ticket_set, kind_rules, passes, strict)
+        ids = ticket_set.frame["id"].to_numpy()
+        results[kind] = [(ids[mask], conditions.unsupported) for mask, conditions in zip(fired, compiled)]
+    return results
+
+
+def _simulate_chunk_job(job):
+    return simulate_chunk(*job)
+
+
+def simulate(tickets, rules, update_type="Change", now=None, strict=False, processes=None, chunk_size=CHUNK_SIZE):
+    """
+    Simulates the rules over all tickets.
+
+    Returns:
+        tuple: (DataFrame with one row per rule firing on a ticket,
+        DataFrame with one summary row per rule).
+    """
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    processes = processes or configured_processes()
+    if processes <= 1:
+        chunk_size = max(chunk_size, len(tickets))
+    jobs = ((tickets.iloc[start:start + chunk_size], rules, update_type, now, strict)
+            for start in range(0, len(tickets), chunk_size))
+
+    fires = {kind: [[] for _ in kind_rules] for kind, kind_rules in rules.items()}
+    unsupported = {kind: [{} for _ in kind_rules] for kind, kind_rules in rules.items()}
+    for chunk in transform(jobs, _simulate_chunk_job, processes=processes, batch_size=1):
+        for kind, rule_results in chunk.items():
+            for index, (ticket_ids, conditions) in enumerate(rule_results):
+                fires[kind][index].append(ticket_ids)
+                for condition, reason in conditions:
+                    unsupported[kind][index][(condition.get("field"), condition.get("operator"))] = reason
+
+    firing_frames, summary = [], []
+    for kind, kind_rules in rules.items():
+        for index, rule in enumerate(kind_rules):
+            ticket_ids = np.concatenate(fires[kind][index]) if fires[kind][index] else np.empty(0)
+            firing_frames.append(pd.DataFrame({
+                "type": kind, "rule_id": rule.get("id"), "title": rule.get("title"), "ticket_id": ticket_ids,
+            }))
+            summary.append({
+                "type": kind,
+                "position": rule.get("position"),
+                "rule_id": rule.get("id"),
+                "title": rule.get("title"),
+                "active": rule.get("active", True),
+                "tickets": len(ticket_ids),
+                "unsupported": "; ".join(f"{field} {operator}: {reason}"
+                                         for (field, operator), reason in unsupported[kind][index].items()),
+            })
+    columns = ["type", "rule_id", "title", "ticket_id"]
+    firings = pd.concat(firing_frames, ignore_index=True) if firing_frames else pd.DataFrame(columns=columns)
+    return firings, pd.DataFrame(summary)
+
+
+def print_report(summary, total_tickets, top=20):
+    for kind, rules in summary.groupby("type", sort=False):
+        firing = rules[rules["tickets"] > 0].sort_values("tickets", ascending=False)
+        print(f"\n{kind.capitalize()}s: {len(firing)} of {len(rules)} fire on at least one of {total_tickets} tickets")
+        for _, rule in firing.head(top).iterrows():
+            print(f"  {rule['tickets']:>9,}  #{rule['position']} {rule['title']} ({rule['rule_id']})")
+
+        never = rules[rules["tickets"] == 0]
+        if len(never):
+            print(f"  Never match ({len(never)}):")
+            for _, rule in never.iterrows():
+                print(f"    #{rule['position']} {rule['title']} ({rule['rule_id']})")
+
+    partial = summary[summary["unsupported"] != ""]
+    if len(partial):
+        print(f"\n{len(partial)} rules have conditions that could not be judged from the export:")
+        for _, rule in partial.iterrows():
+            print(f"  {rule['type']} {rule['title']} ({rule['rule_id']}): {rule['unsupported']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate triggers and automations on exported tickets.")
+    parser.add_argument("--tickets", required=True, help="Ticket export (.json, .jsonl, .csv or .manifest.json)")
+    parser.add_argument("--from-exports", action="store_true",
+                        help="Read rules from the fetch_triggers.py/fetch_automations.py CSVs instead of the API")
+    parser.add_argument("--only", choices=["triggers", "automations"])
+    parser.add_argument("--include-inactive", action="store_true")
+    parser.add_argument("--update-type", choices=["Create", "Change"], default="Change",
+                        help="Simulate triggers as if each ticket was just created or just updated")
+    parser.add_argument("--now", help="Time of the automation run (default: now)")
+    parser.add_argument("--strict", action="store_true", help="Unsupported conditions never match")
+    parser.add_argument("--processes", type=int, help="Worker processes (default: ZENDESK_TRANSFORM_PROCESSES)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--top", type=int, default=20, help="Firing rules to print per type")
+    args = parser.parse_args()
+
+    started = time.time()
+    rules = load_rules(args.from_exports, args.include_inactive)
+    if args.only:
+        rules = {kind: rules[kind] for kind in rules if f"{kind}s" == args.only}
+    tickets = load_tickets(args.tickets)
+    print(f"Loaded {len(tickets)} tickets, {len(rules.get('trigger', []))} triggers and "
+          f"{len(rules.get('automation', []))} automations in {time.time() - started:.1f}s")
+
+    started = time.time()
+    now = pd.Timestamp(args.now) if args.now else None
+    if now is not None and now.tzinfo is None:
+        now = now.tz_localize("UTC")
+    firings, summary = simulate(tickets, rules, args.update_type, now, args.strict, args.processes, args.chunk_size)
+    print(f"Simulated in {time.time() - started:.1f}s")
+
+    firings.to_csv(OUTPUT_FILE, index=False)
+    summary.to_csv(SUMMARY_FILE, index=False)
+    print_report(summary, len(tickets), args.top)
+    print(f"\nFirings saved to {OUTPUT_FILE}, per-rule summary to {SUMMARY_FILE}")
+
+
+if __name__ == "__main__":
+    main()
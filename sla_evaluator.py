@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# sla_evaluator.py
+"""
+Scores exported tickets against the SLA policies saved by fetch_sla_policies.py.
+
+Each policy's filter is compiled once (rule_conditions.py) into vectorized
+predicates, and every ticket is assigned the first policy that matches in
+`position` order, as Zendesk does. Targets for the ticket's priority are
+then looked up for all tickets at once, and each SLA metric gets a status:
+
+    achieved    the metric is complete and within target
+    breached    elapsed time is over target
+    at_risk     still running and past --at-risk of the target (default 80%)
+    active      still running, with time to spare
+
+Supported metrics are first_reply_time and requester_wait_time, using the
+ticket metrics saved by `ticket_metrics_report.py fetch` (ticket_metrics.csv.gz,
+which also holds the ticket fields the policy filters look at). Time still
+accruing on open tickets is measured in calendar time, so live values for
+business-hours targets are approximate and flagged as such. Other metrics
+(next_reply_time, periodic_update_time, agent_work_time...) need comment
+level data and are listed as unsupported.
+
+Large ticket sets can be split into chunks scored in parallel processes.
+
+Usage:
+    python sla_evaluator.py
+    python sla_evaluator.py --tickets ticket_metrics.csv.gz --policies sla_policies.json
+    python sla_evaluator.py --processes 4 --at-risk 0.75
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import profiling
+from rule_conditions import TicketSet, compile_conditions, load_tickets
+from transform_pool import configured_processes, transform
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
+
+POLICIES_FILE = "sla_policies.json"
+TICKETS_FILE = "ticket_metrics.csv.gz"
+OUTPUT_FILE = "sla_status.csv"
+AT_RISK = 0.8
+CHUNK_SIZE = 250000
+
+COMPLETED_STATUSES = {"solved", "closed"}
+# Statuses in which requester wait time keeps accruing
+REQUESTER_WAIT_STATUSES = {"new", "open", "hold"}
+
+SUPPORTED_METRICS = ("first_reply_time", "requester_wait_time")
+
+
+def load_policies(file_name=POLICIES_FILE):
+    with open(file_name) as f:
+        data = json.load(f)
+    policies = data.get("sla_policies", data) if isinstance(data, dict) else data
+    return sorted(policies, key=lambda policy: policy.get("position", 0))
+
+
+def _target_minutes(policy_metric):
+    if policy_metric.get("target_in_seconds") is not None:
+        return policy_metric["target_in_seconds"] / 60.0
+    return float(policy_metric["target"])
+
+
+def _column(frame, name):
+    if name in frame:
+        return pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=float)
+    return np.full(len(frame), np.nan)
+
+
+def _minutes_since(frame, column, now):
+    if column not in frame:
+        return np.full(len(frame), np.nan)
+    times = pd.to_datetime(frame[column], utc=True, errors="coerce")
+    return ((now - times).dt.total_seconds() / 60.0).to_numpy()
+
+
+def _elapsed(frame, metric, business, now):
+    """
+    Returns (elapsed minutes, completed, approximate) arrays for one metric.
+    """
+    kind = "business" if business else "calendar"
+    status = frame["status"].fillna("").astype(str).to_numpy() if "status" in frame else np.full(len(frame), "")
+    solved = np.isin(status, list(COMPLETED_STATUSES))
+
+    if metric == "first_reply_time":
+        recorded = _column(frame, f"reply_time_in_minutes.{kind}")
+        replied = ~np.isnan(recorded)
+        # Not replied yet: the clock has been running since the ticket was created
+        running = ~replied & ~solved
+        elapsed = np.where(replied, recorded, np.where(running, _minutes_since(frame, "created_at", now), np.nan))
+        return elapsed, replied | solved, running & business
+
+    # requester_wait_time: recorded total plus time since the last update while still waiting
+    recorded = np.nan_to_num(_column(frame, f"requester_wait_time_in_minutes.{kind}"))
+    waiting = np.isin(status, list(REQUESTER_WAIT_STATUSES))
+    live = np.nan_to_num(_minutes_since(frame, "updated_at", now))
+    elapsed = recorded + np.where(waiting, np.maximum(live, 0), 0)
+    return elapsed, solved, waiting & business
+
+
+def evaluate_chunk(tickets, policies, now, at_risk=AT_RISK):
+    """
+    Scores one chunk of tickets.
+
+    Returns:
+        DataFrame: One row per (ticket, metric) that has a target, with the
+        policy, target, elapsed minutes, remaining minutes and status.
+    """
+    ticket_set = TicketSet(tickets, now=now)
+    frame = ticket_set.frame
+
+    # First matching policy by position
+    policy_index = np.full(ticket_set.size, -1)
+    for index, policy in enumerate(policies):
+        matches = compile_conditions(policy.get("filter")).evaluate(ticket_set) & (policy_index == -1)
+        policy_index[matches] = index
+
+    priority = ticket_set.strings("priority")
+    results = []
+    for metric in SUPPORTED_METRICS:
+        targets = {}
+        for index, policy in enumerate(policies):
+            for policy_metric in policy.get("policy_metrics", []):
+                if policy_metric.get("metric") == metric:
+                    targets[(index, policy_metric.get("priority") or "")] = (
+                        _target_minutes(policy_metric), bool(policy_metric.get("business_hours")))
+        if not targets:
+            continue
+
+        lookup = pd.DataFrame.from_dict(targets, orient="index", columns=["target", "business"])
+        lookup.index = pd.MultiIndex.from_tuples(lookup.index)
+        found = lookup.reindex(pd.MultiIndex.from_arrays([policy_index, priority]))
+        has_target = found["target"].notna().to_numpy()
+        if not has_target.any():
+            continue
+
+        rows = frame[has_target]
+        target = found["target"].to_numpy()[has_target]
+        business = found["business"].to_numpy()[has_target].astype(bool)
+
+        # Elapsed time for calendar and business targets, picked per ticket
+        calendar_elapsed, completed, _ = _elapsed(rows, metric, False, now)
+        business_elapsed, _, approximate = _elapsed(rows, metric, True, now)
+        elapsed = np.where(business, business_elapsed, calendar_elapsed)
+        approximate = approximate & business
+
+        unknown = np.isnan(elapsed)
+        breached = ~unknown & (elapsed > target)
+        status = np.select(
+            [unknown & completed, unknown, breached, completed, elapsed >= target * at_risk],
+            ["achieved", "unknown", "breached", "achieved", "at_risk"],
+            "active",
+        )
+        results.append(pd.DataFrame({
+            "row": np.flatnonzero(has_target),
+            "ticket_id": rows["id"].to_numpy(),
+            "priority": priority[has_target],
+            "policy": [policies[index]["title"] for index in policy_index[has_target]],
+            "metric": metric,
+            "business_hours": business,
+            "target_minutes": target,
+            "elapsed_minutes": np.round(elapsed, 1),
+            "remaining_minutes": np.round(target - elapsed, 1),
+            "status": status,
+            "approximate": approximate,
+        }))
+
+    if not results:
+        return pd.DataFrame()
+    # Input order, then metric order, so chunked and single runs give the same file
+    results = pd.concat(results, ignore_index=True).sort_values("row", kind="stable")
+    return results.drop(columns="row").reset_index(drop=True)
+
+
+def _evaluate_chunk_job(job):
+    tickets, policies, now, at_risk = job
+    return evaluate_chunk(tickets, policies, now, at_risk)
+
+
+def evaluate_tickets(tickets, policies, at_risk=AT_RISK, processes=None, chunk_size=CHUNK_SIZE, now=None):
+    """Scores every ticket, in parallel chunks when processes > 1."""
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    processes = processes or configured_processes()
+    if processes <= 1:
+        chunk_size = max(chunk_size, len(tickets))
+    jobs = ((tickets.iloc[start:start + chunk_size], policies, now, at_risk)
+            for start in range(0, len(tickets), chunk_size))
+    chunks = list(transform(jobs, _evaluate_chunk_job, processes=processes, batch_size=1))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+
+def unsupported_metrics(policies):
+    return sorted({
+        policy_metric.get("metric") for policy in policies for policy_metric in policy.get("policy_metrics", [])
+        if policy_metric.get("metric") not in SUPPORTED_METRICS
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find SLA breaches and at-risk tickets offline.")
+    parser.add_argument("--tickets", default=TICKETS_FILE, help="Ticket export with metrics (see ticket_metrics_report.py)")
+    parser.add_argument("--policies", default=POLICIES_FILE)
+    parser.add_argument("--at-risk", type=float, default=AT_RISK, help="Fraction of the target that counts as at risk")
+    parser.add_argument("--processes", type=int, help="Worker processes (default: ZENDESK_TRANSFORM_PROCESSES)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    started = time.time()
+    policies = load_policies(args.policies)
+    tickets = load_tickets(args.tickets)
+    print(f"Loaded {len(tickets)} tickets and {len(policies)} SLA policies in {time.time() - started:.1f}s")
+
+    started = time.time()
+    results = evaluate_tickets(tickets, policies, args.at_risk, args.processes, args.chunk_size)
+    print(f"Scored in {time.time() - started:.1f}s")
+    if results.empty:
+        print("No tickets matched a policy with a supported metric.")
+        return
+
+    results.to_csv(args.output, index=False)
+    summary = results.groupby(["policy", "metric", "status"]).size().unstack(fill_value=0)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(summary)
+    approximate = int(results["approximate"].sum())
+    if approximate:
+        print(f"{approximate} running business-hours metrics were measured in calendar time (approximate).")
+    skipped = unsupported_metrics(policies)
+    if skipped:
+        print(f"Not evaluated (needs comment-level data): {', '.join(skipped)}")
+    print(f"Per-ticket status saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
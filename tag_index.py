@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# tag_index.py
+"""
+Local tag -> ticket index.
+
+`build` streams the incremental ticket export once and stores, for every
+tag, a sorted array of the ticket IDs that carry it. The file is a small
+JSON header followed by raw 64-bit integers, so loading it is one read and
+looking up a tag is a zero-copy slice of that buffer.
+
+Usage:
+    python tag_index.py build
+    python tag_index.py query csat_invalid
+    python tag_index.py query vip escalated --all    # tickets with every tag
+    python tag_index.py query vip escalated --any    # tickets with any tag
+"""
+
+import argparse
+import json
+from array import array
+
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
+
+INDEX_FILE = "tag_index.bin"
+MAGIC = b"ZDTAGIDX1\n"
+
+
+def build_tag_index(tickets):
+    """
+    Builds the inverted index from an iterable of ticket dicts.
+
+    The incremental export returns a snapshot of a ticket each time it
+    changed, so only the last snapshot per ticket counts: tags removed later
+    are not indexed, and tickets deleted later are left out entirely.
+
+    Returns:
+        dict: tag -> sorted array('q') of ticket IDs.
+    """
+    latest = {}
+    for ticket in tickets:
+        latest[ticket["id"]] = None if ticket.get("status") == "deleted" else ticket.get("tags") or []
+
+    postings = {}
+    for ticket_id, tags in latest.items():
+        for tag in tags or []:
+            ids = postings.get(tag)
+            if ids is None:
+                ids = postings[tag] = array("q")
+            ids.append(ticket_id)
+    return {tag: array("q", sorted(set(ids))) for tag, ids in postings.items()}
+
+
+def save_tag_index(index, file_name=INDEX_FILE):
+    """Writes the header (tag -> [offset, length]) followed by the ID arrays."""
+    header = {}
+    offset = 0
+    for tag, ids in index.items():
+        header[tag] = [offset, len(ids)]
+        offset += len(ids)
+
+    with open(file_name, "wb") as f:
+        f.write(MAGIC)
+        f.write(json.dumps(header).encode("utf-8") + b"\n")
+        for ids in index.values():
+            ids.tofile(f)
+    print(f"Indexed {len(index)} tags across {offset} tag assignments into {file_name}")
+
+
+class TagIndex:
+    """Read-only view over a saved tag index."""
+
+    def __init__(self, file_name=INDEX_FILE):
+        with open(file_name, "rb") as f:
+            if f.readline() != MAGIC:
+                raise ValueError(f"{file_name} is not a tag index")
+            self.header = json.loads(f.readline())
+            self._ids = memoryview(f.read()).cast("q")
+
+    def tags(self):
+        return list(self.header)
+
+    def tickets_with(self, tag):
+        """Returns the sorted ticket IDs carrying `tag` (empty if unknown)."""
+        offset, length = self.header.get(tag, (0, 0))
+        return self._ids[offset:offset + length]
+
+    def intersection(self, *tags):
+        """Ticket IDs that carry every one of `tags`."""
+        # Start from the rarest tag so the working set stays small
+        postings = sorted((self.tickets_with(tag) for tag in tags), key=len)
+        if not postings:
+            return []
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result.intersection_update(ids)
+        return sorted(result)
+
+    def union(self, *tags):
+        """Ticket IDs that carry at least one of `tags`."""
+        result = set()
+        for tag in tags:
+            result.update(self.tickets_with(tag))
+        return sorted(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the local tag -> ticket index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="Stream all tickets and rebuild the index")
+    query = subparsers.add_parser("query", help="Look up tickets by tag")
+    query.add_argument("tags", nargs="+")
+    mode = query.add_mutually_exclusive_group()
+    mode.add_argument("--all", action="store_true", help="Tickets with every tag (default)")
+    mode.add_argument("--any", action="store_true", help="Tickets with any of the tags")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from zendesk_client import paginate
+
+        tickets = paginate("/incremental/tickets/cursor.json", "tickets", {"start_time": 0})
+        save_tag_index(build_tag_index(tickets))
+        return
+
+    index = TagIndex()
+    ticket_ids = index.union(*args.tags) if args.any else index.intersection(*args.tags)
+    print(f"{len(ticket_ids)} tickets:")
+    print(list(ticket_ids))
+
+
+if __name__ == "__main__":
+    main()
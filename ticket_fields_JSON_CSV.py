@@ -4,6 +4,10 @@ import json
 import csv
 from requests.auth import HTTPBasicAuth
 from dotenv import load_dotenv
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Load environment variables from .env file
 load_dotenv(".env")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# ticket_metrics_report.py
+"""
+First-reply, resolution and wait-time percentiles from ticket metrics.
+
+Ticket metrics (reply time, first/full resolution time, agent and requester
+wait time, solved_at...) are pulled in bulk from the incremental ticket
+export with the `metric_sets` sideload, 1,000 tickets and their metrics per
+request, instead of one request per ticket. Each page is flattened into a
+small DataFrame straight away, and the raw metrics are saved to
+ticket_metrics.csv.gz so reports can be re-run without touching the API.
+
+Percentiles are computed with pandas groupby quantiles over all tickets at
+once, grouped by organization, priority or tag (a ticket counts towards
+each of its tags).
+
+Usage:
+    python ticket_metrics_report.py fetch --since 2024-01-01
+    python ticket_metrics_report.py report --by priority
+    python ticket_metrics_report.py report --by organization --business --top 25
+    python ticket_metrics_report.py report --by tag --percentiles 50 90 99
+"""
+
+import argparse
+import json
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import profiling
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
+
+METRICS_FILE = "ticket_metrics.csv.gz"
+
+# Kept alongside the metrics so the saved file also serves as a ticket corpus (sla_evaluator.py)
+TICKET_COLUMNS = [
+    "id", "organization_id", "priority", "status", "type", "group_id", "assignee_id", "requester_id",
+    "brand_id", "ticket_form_id", "tags", "custom_fields", "created_at", "updated_at",
+]
+
+# Metric name -> column in the flattened metric set, per time kind
+DURATION_METRICS = {
+    "first_reply": "reply_time_in_minutes",
+    "first_resolution": "first_resolution_time_in_minutes",
+    "full_resolution": "full_resolution_time_in_minutes",
+    "agent_wait": "agent_wait_time_in_minutes",
+    "requester_wait": "requester_wait_time_in_minutes",
+}
+METRIC_SET_COLUMNS = ["ticket_id", "solved_at", "reopens", "replies"] + [
+    f"{column}.{kind}" for column in DURATION_METRICS.values() for kind in ("calendar", "business")
+]
+
+GROUP_COLUMNS = {"organization": "organization_id", "priority": "priority", "tag": "tags"}
+DEFAULT_PERCENTILES = [50, 75, 90, 95]
+
+
+def _to_timestamp(date_string):
+    return int(datetime.strptime(date_string, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+def _page_frames(page):
+    tickets = pd.DataFrame(page.get("tickets", []), columns=TICKET_COLUMNS)
+    tickets["organization_id"] = tickets["organization_id"].astype("Int64")
+    tickets["tags"] = tickets["tags"].map(lambda tags: " ".join(tags) if isinstance(tags, list) else "")
+    tickets["custom_fields"] = tickets["custom_fields"].map(
+        lambda fields: json.dumps(fields) if isinstance(fields, list) else "[]")
+    metrics = pd.json_normalize(page.get("metric_sets", []))
+    metrics = metrics.reindex(columns=METRIC_SET_COLUMNS)
+    return tickets, metrics
+
+
+def fetch_ticket_metrics(start_time):
+    """
+    Streams tickets with their metric sets from the incremental export.
+
+    Returns:
+        pandas.DataFrame: One row per ticket with the ticket columns and every
+        duration metric in minutes (calendar and business).
+    """
+    from zendesk_client import iter_pages
+
+    ticket_frames, metric_frames = [], []
+    params = {"start_time": start_time, "include": "metric_sets"}
+    for page in iter_pages("/incremental/tickets/cursor.json", params=params):
+        tickets, metrics = _page_frames(page)
+        ticket_frames.append(tickets)
+        metric_frames.append(metrics)
+        print(f"Fetched {sum(len(frame) for frame in ticket_frames)} tickets...")
+
+    if not ticket_frames:
+        return pd.DataFrame(columns=TICKET_COLUMNS + METRIC_SET_COLUMNS[1:])
+    tickets = pd.concat(ticket_frames, ignore_index=True).drop_duplicates("id", keep="last")
+    metrics = pd.concat(metric_frames, ignore_index=True).drop_duplicates("ticket_id", keep="last")
+    return tickets.merge(metrics, how="left", left_on="id", right_on="ticket_id").drop(columns="ticket_id")
+
+
+def save_ticket_metrics(metrics, file_name=METRICS_FILE):
+    metrics.to_csv(file_name, index=False)
+    print(f"Saved metrics for {len(metrics)} tickets to {file_name}")
+
+
+def load_ticket_metrics(file_name=METRICS_FILE):
+    return pd.read_csv(file_name, dtype={"organization_id": "Int64", "tags": str, "priority": str, "status": str})
+
+
+def percentile_report(metrics, by, percentiles=DEFAULT_PERCENTILES, business=False):
+    """
+    Computes duration percentiles per group.
+
+    Args:
+        metrics (DataFrame): Output of fetch_ticket_metrics/load_ticket_metrics.
+        by (str): "organization", "priority" or "tag".
+        percentiles (list): Percentiles to report (0-100).
+        business (bool): Use business minutes instead of calendar minutes.
+
+    Returns:
+        pandas.DataFrame: One row per group with a ticket count and one column
+        per (metric, percentile), in hours, sorted by ticket count.
+    """
+    kind = "business" if business else "calendar"
+    columns = {f"{column}.{kind}": name for name, column in DURATION_METRICS.items()}
+    frame = metrics[[GROUP_COLUMNS[by]] + list(columns)].rename(columns=columns)
+    frame = frame.rename(columns={GROUP_COLUMNS[by]: by})
+
+    if by == "tag":
+        frame = frame.assign(tag=frame["tag"].fillna("").str.split()).explode("tag")
+    frame[by] = frame[by].astype("string").fillna("(none)")
+
+    # Minutes -> hours for every metric at once
+    frame[list(columns.values())] = frame[list(columns.values())].astype(float) / 60.0
+
+    grouped = frame.groupby(by, sort=False)
+    quantiles = grouped[list(columns.values())].quantile([p / 100.0 for p in percentiles]).unstack()
+    quantiles.columns = [f"{metric}_p{q * 100:g}_hours" for metric, q in quantiles.columns]
+    report = pd.concat([grouped.size().rename("tickets"), quantiles], axis=1)
+    return report.sort_values("tickets", ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ticket metric percentiles by organization, priority or tag.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    fetch = subparsers.add_parser("fetch", help="Download ticket metrics")
+    fetch.add_argument("--since", required=True, help="Tickets updated since this date (YYYY-MM-DD)")
+    report = subparsers.add_parser("report", help="Print percentiles from the saved metrics")
+    report.add_argument("--by", choices=list(GROUP_COLUMNS), default="priority")
+    report.add_argument("--percentiles", nargs="+", type=float, default=DEFAULT_PERCENTILES)
+    report.add_argument("--business", action="store_true", help="Use business hours instead of calendar hours")
+    report.add_argument("--top", type=int, default=20, help="Groups to print (all are saved to CSV)")
+    args = parser.parse_args()
+
+    if args.command == "fetch":
+        save_ticket_metrics(fetch_ticket_metrics(_to_timestamp(args.since)))
+        return
+
+    result = percentile_report(load_ticket_metrics(), args.by, args.percentiles, args.business)
+    output_file = f"ticket_metrics_by_{args.by}.csv"
+    result.to_csv(output_file)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(result.head(args.top).round(1))
+    print(f"\nFull report for {len(result)} groups saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
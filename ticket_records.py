@@ -0,0 +1,103 @@
+"""
+Compact, slotted ticket records.
+
+A ticket from the API is a dict with 40+ keys, including the full
+description and every custom field. When a script only needs a handful of
+columns, `record_type(fields)` builds a class with exactly those
+`__slots__`; instances have no per-object __dict__ and hold only the
+projected values, so large filtered sets take a fraction of the memory.
+
+Custom field lists are stored as tuples of (id, value) pairs rather than
+lists of dicts, and short repeated strings (status, priority, type) are
+interned. Records keep a dict-like `get()` that hands back the original
+shapes, so code written against ticket dicts (`ticket.get("status")`) works
+unchanged, and `to_dict()` for JSON output.
+"""
+
+import sys
+
+# Lists of {"id": ..., "value": ...} dicts stored as (id, value) pairs
+PAIR_FIELDS = {"custom_fields", "fields"}
+
+# Strings up to this length are interned so repeated values share one object
+INTERN_MAX_LENGTH = 32
+
+_record_types = {}
+
+
+def _compact(name, value):
+    if name in PAIR_FIELDS and isinstance(value, list):
+        return tuple((item.get("id"), item.get("value")) for item in value)
+    if isinstance(value, str) and len(value) <= INTERN_MAX_LENGTH:
+        return sys.intern(value)
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def _expand(name, value):
+    if name in PAIR_FIELDS and isinstance(value, tuple):
+        return [{"id": field_id, "value": field_value} for field_id, field_value in value]
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+class CompactRecord:
+    __slots__ = ()
+    _fields = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        for name in cls._fields:
+            setattr(record, name, _compact(name, data.get(name)))
+        return record
+
+    def get(self, name, default=None):
+        if name in self._fields:
+            return _expand(name, getattr(self, name))
+        return default
+
+    def __getitem__(self, name):
+        if name not in self._fields:
+            raise KeyError(name)
+        return _expand(name, getattr(self, name))
+
+    def to_dict(self):
+        return {name: _expand(name, getattr(self, name)) for name in self._fields}
+
+    def __reduce__(self):
+        # Record classes are built at runtime, so pickle (for worker processes) by field names
+        return _rebuild, (self._fields, tuple(getattr(self, name) for name in self._fields))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def record_type(fields):
+    """Returns (and caches) a slotted record class for the given field names."""
+    fields = tuple(fields)
+    cls = _record_types.get(fields)
+    if cls is None:
+        cls = type("TicketRecord", (CompactRecord,), {"__slots__": fields, "_fields": fields})
+        _record_types[fields] = cls
+    return cls
+
+
+def _rebuild(fields, values):
+    record = record_type(fields).__new__(record_type(fields))
+    for name, value in zip(fields, values):
+        setattr(record, name, value)
+    return record
+
+
+def project(items, fields):
+    """Converts dicts to compact records holding only `fields`."""
+    cls = record_type(fields)
+    return [cls.from_dict(item) for item in items]
+
+
+def as_dicts(items):
+    """Turns records back into plain dicts for JSON output; dicts pass through."""
+    return [item.to_dict() if isinstance(item, CompactRecord) else item for item in items]
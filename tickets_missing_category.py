@@ -1,47 +1,84 @@
 import os
 import requests
-import json
 import csv
-from requests.auth import HTTPBasicAuth
 from dotenv import load_dotenv
+import json_codec
+import output_writer
+import ticket_records
+import field_decoder
+from transform_pool import transform
+import profiling
+from zendesk_client import request
+
+# Accept --profile on the command line (see profiling.py)
+profiling.install_from_argv()
 
 # Load environment variables from .env file
 load_dotenv(".env")
 
 # Credentials and base URL
 SUBDOMAIN = os.getenv("ZENDESK_SUBDOMAIN")
-EMAIL = os.getenv("ZENDESK_EMAIL")
-API_TOKEN = os.getenv("ZENDESK_API_TOKEN")
 BASE_URL = f"https://{SUBDOMAIN}.zendesk.com/api/v2"
 
+# The columns written to the CSV file
+CSV_HEADERS = [
+    "url", "id", "created_at", "updated_at", "type", "subject", "description", "priority", 
+    "status", "organization_id", "tags", "custom_fields", "satisfaction_rating", "fields", 
+    "from_messaging_channel"
+]
+
+# Fields the missing-category filter looks at
+FILTER_FIELDS = ["status", "ticket_category"]
+
 # Fetch tickets function
-def fetch_tickets(max_tickets=100):
+def fetch_tickets(max_tickets=100, fields=None):
+    """
+    Fetches open, pending and on-hold tickets that have no category.
+
+    Args:
+        max_tickets (int, optional): Maximum number of tickets to keep. None for no limit.
+        fields (list, optional): Only keep these fields on each ticket. Pages are then
+            decoded keeping just these fields and tickets are stored as compact slotted
+            records instead of full dicts. None keeps the full ticket JSON.
+
+    Returns:
+        list: Matching tickets (dicts, or records when `fields` is given).
+    """
     try:
         url = f"{BASE_URL}/tickets.json"
         all_tickets = []
+        decode_fields = list(dict.fromkeys(list(fields) + FILTER_FIELDS)) if fields else None
+
+        while url and (max_tickets is None or len(all_tickets) < max_tickets):
+            # Retries 429s through the shared rate limiter, up to zendesk_client.MAX_RETRIES times
+            try:
+                response = request("GET", url)
+            except requests.exceptions.RequestException as e:
+                print(f"Failed to fetch tickets: {e}")
+                break
 
-        while url and len(all_tickets) < max_tickets:
-            response = requests.get(url, auth=HTTPBasicAuth(f"{EMAIL}/token", API_TOKEN))
+            if decode_fields:
+                # Drop every field we don't need while the page is parsed
+                data = json_codec.decode_records(response.content, "tickets", decode_fields)
+            else:
+                data = json_codec.decode_response(response)
+            tickets = data.get("tickets", [])
 
-            if response.status_code == 200:
-                data = response.json()
-                tickets = data.get("tickets", [])
+            # Filter tickets with status 'open', 'pending', or 'hold' and missing category
+            filtered_tickets = [
+                ticket for ticket in tickets 
+                if ticket.get("status") in {"open", "pending", "hold"} and not ticket.get("ticket_category")
+            ]
 
-                # Filter tickets with status 'open', 'pending', or 'hold' and missing category
-                filtered_tickets = [
-                    ticket for ticket in tickets 
-                    if ticket.get("status") in {"open", "pending", "hold"} and not ticket.get("ticket_category")
-                ]
+            if fields:
+                filtered_tickets = ticket_records.project(filtered_tickets, fields)
 
-                remaining_slots = max_tickets - len(all_tickets)
-                all_tickets.extend(filtered_tickets[:remaining_slots])
-                print(f"Fetched {len(filtered_tickets[:remaining_slots])} valid tickets.")
+            remaining_slots = len(filtered_tickets) if max_tickets is None else max_tickets - len(all_tickets)
+            all_tickets.extend(filtered_tickets[:remaining_slots])
+            print(f"Fetched {len(filtered_tickets[:remaining_slots])} valid tickets.")
 
-                # Get the next page URL
-                url = data.get("next_page")
-            else:
-                print(f"Failed to fetch tickets: {response.status_code} - {response.text}")
-                break
+            # Get the next page URL
+            url = data.get("next_page")
 
         print(f"Total tickets fetched: {len(all_tickets)}")
         return all_tickets
@@ -53,30 +90,64 @@ def fetch_tickets(max_tickets=100):
 # Save tickets to a JSON file
 def save_tickets_to_json(tickets, file_name="tickets_missing_category.json"):
     try:
-        with open(file_name, "w") as file:
-            json.dump(tickets, file, indent=4)
+        if output_writer.streaming_enabled():
+            # Compressed/sharded JSON Lines, one ticket per line
+            with output_writer.open_export(os.path.splitext(file_name)[0] + ".jsonl") as writer:
+                writer.writerows(ticket_records.as_dicts(tickets))
+            print(f"Tickets saved to {len(writer.shards)} shard(s), see {writer.path}.manifest.json")
+            return
+        with open(file_name, "w", encoding="utf-8") as file:
+            json_codec.dump(ticket_records.as_dicts(tickets), file, indent=True)
         print(f"Tickets saved to {file_name}")
     except Exception as e:
         print(f"An error occurred while saving the JSON file: {e}")
 
+def ticket_row(ticket):
+    """Builds the CSV row for one ticket."""
+    return {key: ticket.get(key, None) for key in CSV_HEADERS}
+
 # Save tickets to a CSV file
-def save_tickets_to_csv(tickets, file_name="tickets_missing_category.csv"):
+def save_tickets_to_csv(tickets, file_name="tickets_missing_category.csv", expand_custom_fields=None):
+    """
+    Writes the CSV columns for each ticket. With expand_custom_fields (by default
+    ZENDESK_EXPAND_CUSTOM_FIELDS=1) one readable column per custom field is added.
+    """
+    if expand_custom_fields is None:
+        expand_custom_fields = field_decoder.expansion_enabled()
     try:
         if tickets:
             # Define the headers to include
-            headers = [
-                "url", "id", "created_at", "updated_at", "type", "subject", "description", "priority", 
-                "status", "organization_id", "tags", "custom_fields", "satisfaction_rating", "fields", 
-                "from_messaging_channel"
-            ]
+            headers = CSV_HEADERS
+
+            if expand_custom_fields:
+                # Add one readable column per custom field, named after the field
+                import pandas as pd
+
+                named_fields = field_decoder.expand_custom_fields(tickets, field_decoder.load_field_index())
+                rows = pd.DataFrame(list(transform(tickets, ticket_row)), columns=headers)
+                rows = pd.concat([rows, named_fields], axis=1)
+                if output_writer.streaming_enabled():
+                    with output_writer.open_export(file_name, fieldnames=list(rows.columns)) as writer:
+                        writer.writerows(rows.astype(object).where(rows.notna(), None).to_dict("records"))
+                    print(f"Tickets saved to {len(writer.shards)} shard(s), see {file_name}.manifest.json")
+                else:
+                    rows.to_csv(file_name, index=False)
+                    print(f"Tickets saved to {file_name}")
+                return
+
+            if output_writer.streaming_enabled():
+                with output_writer.open_export(file_name, fieldnames=headers) as writer:
+                    writer.writerows(transform(tickets, ticket_row))
+                print(f"Tickets saved to {len(writer.shards)} shard(s), see {file_name}.manifest.json")
+                return
 
             with open(file_name, "w", newline="") as file:
                 writer = csv.DictWriter(file, fieldnames=headers)
                 writer.writeheader()
 
-                # Write filtered ticket data
-                for ticket in tickets:
-                    writer.writerow({key: ticket.get(key, None) for key in headers})
+                # Write filtered ticket data (rows are built in worker processes
+                # when ZENDESK_TRANSFORM_PROCESSES is set)
+                writer.writerows(transform(tickets, ticket_row))
 
             print(f"Tickets saved to {file_name}")
         else:
@@ -86,9 +157,15 @@ def save_tickets_to_csv(tickets, file_name="tickets_missing_category.csv"):
 
 # Main logic
 if __name__ == "__main__":
-    tickets = fetch_tickets(max_tickets=100)     # Set a limit on the number of tickets fetched (default: 100).
+    # Set a limit on the number of tickets fetched (default: 100). The JSON file gets the
+    # full ticket data, so every field is kept.
+    tickets = fetch_tickets(max_tickets=100)
     # To fetch unlimited tickets, modify the parameter as follows:
     # tickets = fetch_tickets(max_tickets=None)
+    # When only the CSV is needed, fields=CSV_HEADERS keeps just its columns in memory:
+    # tickets = fetch_tickets(max_tickets=None, fields=CSV_HEADERS); save_tickets_to_csv(tickets)
     if tickets:
         save_tickets_to_json(tickets)
         save_tickets_to_csv(tickets)
+        # Set ZENDESK_EXPAND_CUSTOM_FIELDS=1 in .env for readable custom field columns
+        # (uses ticket_fields.json from ticket_fields_JSON_CSV.py)
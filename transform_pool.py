@@ -0,0 +1,80 @@
+"""
+Optional process-pool stage for the CPU-heavy part of large exports.
+
+Turning a million raw API records into CSV rows (building row dicts,
+serializing nested conditions/actions to JSON, ...) runs on a single core.
+`transform(items, func)` hands the records to a pool of worker processes in
+batches and yields the results in the same order as the input, so output
+files are identical to a serial run. Only a few batches per worker are in
+flight at once, so results stream to the writer instead of piling up in
+memory.
+
+The stage is off unless enabled in the environment (.env):
+    ZENDESK_TRANSFORM_PROCESSES=auto     # one worker per CPU core
+    ZENDESK_TRANSFORM_PROCESSES=4        # or a fixed number
+
+`func` must be a module-level function so worker processes can import it.
+"""
+
+import os
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+
+import profiling
+
+BATCH_SIZE = 2000  # Records sent to a worker at a time
+BATCHES_IN_FLIGHT = 2  # Per worker, bounds memory while keeping workers busy
+
+
+def configured_processes():
+    """Worker processes from ZENDESK_TRANSFORM_PROCESSES; 1 means run in-process."""
+    value = os.getenv("ZENDESK_TRANSFORM_PROCESSES", "").strip().lower()
+    if value == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(value)) if value else 1
+
+
+def _apply(func, batch):
+    return [func(item) for item in batch]
+
+
+def _batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def transform(items, func, processes=None, batch_size=BATCH_SIZE):
+    """
+    Yields func(item) for every item, in input order.
+
+    Args:
+        items (iterable): Records to transform; may be a generator over pages.
+        func (callable): Module-level function applied to each record.
+        processes (int, optional): Worker processes. Defaults to configured_processes().
+        batch_size (int): Records per task sent to a worker.
+    """
+    processes = processes or configured_processes()
+    if processes <= 1:
+        for item in items:
+            with profiling.phase("transform"):
+                result = func(item)
+            yield result
+        return
+
+    with Pool(processes) as pool:
+        pending = deque()
+        for batch in _batches(items, batch_size):
+            pending.append(pool.apply_async(_apply, (func, batch)))
+            if len(pending) >= processes * BATCHES_IN_FLIGHT:
+                with profiling.phase("transform (waiting on workers)"):
+                    results = pending.popleft().get()
+                yield from results
+        while pending:
+            with profiling.phase("transform (waiting on workers)"):
+                results = pending.popleft().get()
+            yield from results
@@ -0,0 +1,163 @@
+"""
+Shared helpers for the scripts that walk large Zendesk collections.
+
+Credentials come from the same .env file the other scripts use. `paginate`
+follows whichever paging style an endpoint returns (cursor `links.next`,
+offset `next_page` or the incremental export `after_url`/`end_of_stream`)
+so callers can stream every record without caring how it is paged.
+
+The module-level functions talk to the instance configured in .env. To work
+with several Zendesk instances at once, create a ZendeskInstance for each;
+every instance has its own connection pool and rate limiter.
+
+Set ZENDESK_HTTP2=1 to send requests over multiplexed HTTP/2 connections
+when httpx[http2] is installed (see http2_transport.py).
+"""
+
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from dotenv import load_dotenv
+
+import cassette
+import http2_transport
+import json_codec
+import profiling
+from rate_limiter import DEFAULT_RATE_LIMIT, RateLimiter, get_rate_limiter
+
+# Load environment variables from .env file
+load_dotenv(".env")
+
+# Every script built on this module accepts --profile and ZENDESK_CASSETTE
+profiling.install_from_argv()
+cassette.install_from_env()
+
+SUBDOMAIN = os.getenv("ZENDESK_SUBDOMAIN")
+EMAIL = os.getenv("ZENDESK_EMAIL")
+API_TOKEN = os.getenv("ZENDESK_API_TOKEN")
+BASE_URL = f"https://{SUBDOMAIN}.zendesk.com/api/v2"
+
+MAX_RETRIES = 5
+POOL_SIZE = 10  # Connections kept open per instance
+
+
+class ZendeskInstance:
+    """
+    Example:
+        eu = ZendeskInstance("acme-eu", "admin@acme.com", token, rate_limit=400)
+        for org in eu.paginate("/organizations", "organizations", {"page[size]": 100}):
+            ...
+    """
+
+    def __init__(self, subdomain, email, api_token, rate_limit=DEFAULT_RATE_LIMIT, limiter=None,
+                 pool_size=POOL_SIZE):
+        self.subdomain = subdomain
+        self.base_url = f"https://{subdomain}.zendesk.com/api/v2"
+        auth = HTTPBasicAuth(f"{email}/token", api_token)
+        headers = {"Content-Type": "application/json"}
+        if http2_transport.enabled():
+            # Concurrent requests share a few connections as HTTP/2 streams
+            self.session = http2_transport.Http2Session(auth, headers, max_connections=pool_size)
+        else:
+            self.session = requests.Session()
+            self.session.auth = auth
+            self.session.headers.update(headers)
+            self.session.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        self.limiter = limiter or RateLimiter(
+            subdomain,
+            priority=int(os.getenv("ZENDESK_RATE_PRIORITY", "1")),
+            per_minute=rate_limit,
+        )
+
+    def request(self, method, url, session=None, **kwargs):
+        """
+        Sends a request, waiting out 429 responses using the Retry-After header.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Full URL or a path relative to the API root (e.g. "/tickets").
+
+        Returns:
+            requests.Response: The final response. Errors are raised as
+            requests.exceptions.HTTPError.
+        """
+        session = session or self.session
+        if not url.startswith("http"):
+            url = f"{self.base_url}{url}"
+
+        for _ in range(MAX_RETRIES):
+            with profiling.phase("rate limit wait"):
+                self.limiter.acquire()
+            response = session.request(method, url, **kwargs)
+            if response.status_code != 429:
+                break
+            wait = int(response.headers.get("Retry-After", 60))
+            print(f"[{self.subdomain}] Rate limited, retrying in {wait} seconds...")
+            # Pause every script sharing this account, not just this one
+            self.limiter.penalize(wait)
+
+        response.raise_for_status()
+        return response
+
+    def iter_pages(self, url, params=None, session=None):
+        """
+        Yields each page (decoded JSON) of a paginated endpoint until the last one.
+        """
+        while url:
+            data = json_codec.decode_response(self.request("GET", url, session=session, params=params))
+            yield data
+
+            # The next URL already carries the query string
+            params = None
+            if "end_of_stream" in data:
+                url = None if data["end_of_stream"] else (data.get("after_url") or data.get("next_page"))
+            elif "meta" in data:
+                url = data.get("links", {}).get("next") if data["meta"].get("has_more") else None
+            else:
+                url = data.get("next_page")
+
+    def paginate(self, url, key, params=None, session=None):
+        """
+        Yields every record under `key` across all pages of an endpoint.
+
+        Example:
+            for ticket in paginate("/incremental/tickets/cursor.json", "tickets", {"start_time": 0}):
+                ...
+        """
+        for page in self.iter_pages(url, params=params, session=session):
+            yield from page.get(key, [])
+
+
+_default_instance = None
+
+
+def get_default_instance():
+    """Returns the instance configured in .env, shared by the whole script."""
+    global _default_instance
+    if _default_instance is None:
+        _default_instance = ZendeskInstance(SUBDOMAIN, EMAIL, API_TOKEN, limiter=get_rate_limiter())
+    return _default_instance
+
+
+def get_session():
+    """Returns a shared, authenticated session so connections are reused."""
+    return get_default_instance().session
+
+
+def request(method, url, session=None, **kwargs):
+    return get_default_instance().request(method, url, session=session, **kwargs)
+
+
+def iter_pages(url, params=None, session=None):
+    return get_default_instance().iter_pages(url, params=params, session=session)
+
+
+def paginate(url, key, params=None, session=None):
+    return get_default_instance().paginate(url, key, params=params, session=session)
+
+
+request.__doc__ = ZendeskInstance.request.__doc__
+iter_pages.__doc__ = ZendeskInstance.iter_pages.__doc__
+paginate.__doc__ = ZendeskInstance.paginate.__doc__